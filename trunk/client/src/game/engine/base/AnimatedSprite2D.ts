@@ -33,6 +33,20 @@ interface SpriteSheetData {
   frames: Record<string, SpriteSheetFrame>;
 }
 
+/**
+ * 分组输出模式下的动作索引（spritesheet_index.json）
+ * 每个动作指向所在分组的清单（格式同 SpriteSheetData）及其图片
+ */
+interface SpriteSheetIndex {
+  meta: Omit<SpriteSheetMeta, 'sheets'>;
+  actions: Record<string, {
+    group: string;
+    manifest: string;
+    images: Array<{ file: string; bytes: number }>;
+    bytes: number;
+  }>;
+}
+
 /**
  * AnimatedSprite2D - 动画精灵
  * 继承自 Sprite2D，支持多个动画片段和快速切换
@@ -152,24 +166,93 @@ export class AnimatedSprite2D extends Sprite2D {
 
   /**
    * 从 video_to_spritesheet 生成的 JSON 创建动画精灵
-   * @param jsonPath JSON 文件路径（如 '/unit/monkey.json'）
+   * @param jsonPath JSON 文件路径（如 '/unit/monkey.json'），也可以是分组输出的 spritesheet_index.json
    * @param blackboard 黑板对象
+   * @param actions 只加载这些动作（不传则加载全部）；使用索引时只下载这些动作所在分组的图片
    * @returns Promise<AnimatedSprite2D>
    */
-  static async create(jsonPath: string, blackboard: Record<string, any> = {}): Promise<AnimatedSprite2D> {
-    // 1. 加载 JSON 数据
-    const data = await assets.getJson<SpriteSheetData>(jsonPath);
+  static async create(
+    jsonPath: string,
+    blackboard: Record<string, any> = {},
+    actions?: string[]
+  ): Promise<AnimatedSprite2D> {
+    const clips = await AnimatedSprite2D.loadClips(jsonPath, actions);
+    
+    if (clips.length === 0) {
+      throw new Error(`No animation clips found in ${jsonPath}`);
+    }
+    
+    return new AnimatedSprite2D(clips, blackboard);
+  }
+
+  /**
+   * 按需加载更多动作（已加载的动作会跳过）
+   * @param jsonPath spritesheet_index.json 或 spritesheet.json 路径
+   * @param actions 需要的动作名
+   */
+  async loadActions(jsonPath: string, actions: string[]): Promise<void> {
+    const missing = actions.filter(action => !this.clips.has(action));
+    if (missing.length === 0) {
+      return;
+    }
     
-    // 2. 提取基础路径（去除文件名）
+    const clips = await AnimatedSprite2D.loadClips(jsonPath, missing);
+    clips.forEach(clip => this.addClip(clip));
+  }
+
+  /**
+   * 加载 JSON 并创建动作对应的 AnimationClip
+   * 索引文件只加载所需动作所在分组的清单，普通 JSON 直接按动作过滤
+   */
+  private static async loadClips(jsonPath: string, actions?: string[]): Promise<AnimationClip[]> {
+    const data = await assets.getJson<SpriteSheetData | SpriteSheetIndex>(jsonPath);
+    const wanted = actions ? new Set(actions) : undefined;
+    
+    if (!('actions' in data)) {
+      return AnimatedSprite2D.buildClips(jsonPath, data, wanted);
+    }
+    
+    const basePath = jsonPath.substring(0, jsonPath.lastIndexOf('/'));
+    const manifests = new Set<string>();
+    for (const [action, entry] of Object.entries(data.actions)) {
+      if (!wanted || wanted.has(action)) {
+        manifests.add(entry.manifest);
+      }
+    }
+    
+    const clips: AnimationClip[] = [];
+    for (const manifest of manifests) {
+      const manifestPath = `${basePath}/${manifest}`;
+      const manifestData = await assets.getJson<SpriteSheetData>(manifestPath);
+      clips.push(...await AnimatedSprite2D.buildClips(manifestPath, manifestData, wanted));
+    }
+    return clips;
+  }
+
+  /**
+   * 从 spritesheet JSON 数据创建 AnimationClip
+   * @param jsonPath JSON 文件路径（用于定位图片和生成 imageId）
+   * @param data JSON 数据
+   * @param wanted 只创建这些动作（不传则全部）
+   */
+  private static async buildClips(
+    jsonPath: string,
+    data: SpriteSheetData,
+    wanted?: Set<string>
+  ): Promise<AnimationClip[]> {
+    // 1. 提取基础路径（去除文件名）
     const lastSlashIndex = jsonPath.lastIndexOf('/');
     const basePath = jsonPath.substring(0, lastSlashIndex);
     
-    // 3. 加载所有 spritesheet 图片
+    const frameEntries = Object.entries(data.frames)
+      .filter(([, frameData]) => !wanted || wanted.has(frameData.action));
+    
+    // 2. 加载需要的 spritesheet 图片
     const sheetImages = new Map<string, HTMLImageElement>();
     const sheetNames = new Set<string>();
     
     // 收集所有需要的 sheet 图片名
-    for (const frameData of Object.values(data.frames)) {
+    for (const [, frameData] of frameEntries) {
       sheetNames.add(frameData.image);
     }
     
@@ -180,13 +263,13 @@ export class AnimatedSprite2D extends Sprite2D {
       sheetImages.set(sheetName, img);
     }
     
-    // 4. 按动作分组帧数据
+    // 3. 按动作分组帧数据
     const actionFrames = new Map<string, Array<{
       key: string;
       data: SpriteSheetFrame;
     }>>();
     
-    for (const [key, frameData] of Object.entries(data.frames)) {
+    for (const [key, frameData] of frameEntries) {
       const action = frameData.action;
       if (!actionFrames.has(action)) {
         actionFrames.set(action, []);
@@ -194,7 +277,7 @@ export class AnimatedSprite2D extends Sprite2D {
       actionFrames.get(action)!.push({ key, data: frameData });
     }
     
-    // 5. 为每个动作创建 AnimationClip
+    // 4. 为每个动作创建 AnimationClip
     const clips: AnimationClip[] = [];
     
     for (const [actionName, frames] of actionFrames) {
@@ -220,17 +303,34 @@ export class AnimatedSprite2D extends Sprite2D {
         const trimmedCtx = trimmedCanvas.getContext('2d');
         
         if (trimmedCtx) {
-          trimmedCtx.drawImage(
-            sheetImage,
-            frameData.frame.x,
-            frameData.frame.y,
-            frameData.frame.w,
-            frameData.frame.h,
-            0,
-            0,
-            frameData.frame.w,
-            frameData.frame.h
-          );
+          if (frameData.rotated) {
+            // 旋转的帧在图集中顺时针转了90°，占 h x w，这里逆时针转回来
+            trimmedCtx.translate(0, frameData.frame.h);
+            trimmedCtx.rotate(-Math.PI / 2);
+            trimmedCtx.drawImage(
+              sheetImage,
+              frameData.frame.x,
+              frameData.frame.y,
+              frameData.frame.h,
+              frameData.frame.w,
+              0,
+              0,
+              frameData.frame.h,
+              frameData.frame.w
+            );
+          } else {
+            trimmedCtx.drawImage(
+              sheetImage,
+              frameData.frame.x,
+              frameData.frame.y,
+              frameData.frame.w,
+              frameData.frame.h,
+              0,
+              0,
+              frameData.frame.w,
+              frameData.frame.h
+            );
+          }
 
           // 根据 TexturePacker 规则恢复到原始尺寸，保持锚点稳定
           const sourceW = frameData.sourceSize?.w ?? frameData.frame.w;
@@ -266,12 +366,7 @@ export class AnimatedSprite2D extends Sprite2D {
       }
     }
     
-    if (clips.length === 0) {
-      throw new Error(`No animation clips found in ${jsonPath}`);
-    }
-    
-    // 6. 创建并返回 AnimatedSprite2D 实例
-    return new AnimatedSprite2D(clips, blackboard);
+    return clips;
   }
 
   /**
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+性能基准测试
+用法:
+    python benchmark.py bg --model u2net --frame-size 512
+    python benchmark.py trim --sizes 256 512 1024
+    python benchmark.py memory --frames 400 --frame-size 1024 --atlas-size 4096
+    python benchmark.py decode input.mp4 --frame-size 512 --intervals 1 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+from PIL import Image
+
+
+def make_test_frames(count: int, size: int, seed: int = 0) -> list:
+    """生成带前景色块的随机测试帧（RGB）"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        data = rng.integers(0, 40, size=(size, size, 3), dtype=np.uint8)
+        x0 = int(size * 0.2) + i % max(1, size // 10)
+        data[size // 4:size * 3 // 4, x0:x0 + size // 3] = (230, 160, 60)
+        frames.append(Image.fromarray(data))
+    return frames
+
+
+def bench_bg(args):
+    """去背景批量推理: 不同批大小下的帧/秒（CPU）"""
+    from bg_removal import BatchBackgroundRemover
+
+    frames = make_test_frames(args.frames, args.frame_size)
+    print(f"[去背景] 模型: {args.model}, 帧大小: {args.frame_size}, 帧数: {args.frames}")
+
+    for batch_size in args.batch_sizes:
+        remover = BatchBackgroundRemover(args.model, batch_size)
+        remover.remove_batch(frames[:batch_size])  # 预热
+
+        start = time.perf_counter()
+        remover.remove_batch(frames)
+        elapsed = time.perf_counter() - start
+
+        print(f"  batch={batch_size:<3d} {len(frames) / elapsed:8.2f} 帧/秒  ({elapsed:.2f}s)")
+
+
+def legacy_trim_image(image):
+    """旧版逐像素裁剪实现（仅用于对比）"""
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    data = image.getdata()
+    width, height = image.size
+    left, right, top, bottom = width, 0, height, 0
+    for y in range(height):
+        for x in range(width):
+            if data[y * width + x][3] > 0:
+                left = min(left, x)
+                right = max(right, x)
+                top = min(top, y)
+                bottom = max(bottom, y)
+    if left >= right or top >= bottom:
+        return image.crop((0, 0, 0, 0)), {'x': 0, 'y': 0, 'w': 0, 'h': 0}
+    trimmed = image.crop((left, top, right + 1, bottom + 1))
+    return trimmed, {'x': left, 'y': top, 'w': trimmed.width, 'h': trimmed.height}
+
+
+def make_test_sprite(size: int) -> Image.Image:
+    """生成中间有不透明内容、四周透明的RGBA测试帧"""
+    data = np.zeros((size, size, 4), dtype=np.uint8)
+    data[size // 5:size * 4 // 5, size // 3:size * 2 // 3] = (200, 120, 40, 255)
+    return Image.fromarray(data)
+
+
+def bench_trim(args):
+    """自动裁剪: NumPy实现 vs 旧版逐像素实现"""
+    from main import VideoToSpriteSheet
+
+    print(f"[自动裁剪] 重复次数: {args.repeat}")
+    for size in args.sizes:
+        image = make_test_sprite(size)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            _, new_info = VideoToSpriteSheet.trim_image(image)
+        new_time = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        _, old_info = legacy_trim_image(image)
+        old_time = time.perf_counter() - start
+
+        same = '一致' if new_info == old_info else f'不一致 {old_info} -> {new_info}'
+        print(f"  {size}x{size}: 旧 {old_time * 1000:9.2f}ms  新 {new_time * 1000:7.3f}ms  "
+              f"加速 {old_time / new_time:8.1f}x  结果{same}")
+
+
+def max_rss_mb() -> float:
+    """当前进程的内存峰值（MB，仅Linux/macOS）"""
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位是KB，macOS上是字节
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def make_frame_list(frames_dir: str, count: int, size: int) -> list:
+    """逐帧生成并保存裁剪后的测试帧，返回与extract_frames相同格式的帧信息"""
+    from main import VideoToSpriteSheet
+
+    rng = np.random.default_rng(0)
+    frame_list = []
+    for i in range(count):
+        data = np.zeros((size, size, 4), dtype=np.uint8)
+        w, h = int(size * rng.uniform(0.3, 0.6)), int(size * rng.uniform(0.5, 0.9))
+        x, y = int(rng.integers(0, size - w)), int(rng.integers(0, size - h))
+        data[y:y + h, x:x + w, :3] = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        data[y:y + h, x:x + w, 3] = 255
+        trimmed, trim_info = VideoToSpriteSheet.trim_image(Image.fromarray(data))
+        path = os.path.join(frames_dir, f"bench_{i:05d}.png")
+        trimmed.save(path)
+        frame_list.append({
+            'index': i,
+            'name': f"bench_{i:05d}.png",
+            'action': 'bench',
+            'path': path,
+            'trim_info': trim_info,
+            'original_size': size,
+            'timestamp': i / 30
+        })
+    return frame_list
+
+
+def _memory_worker(frame_list: list, output_dir: str, atlas_size: int, low_memory: bool, queue):
+    """在独立进程中装箱，回报导入完成后和装箱完成后的内存峰值"""
+    import contextlib
+    import io
+    from main import VideoToSpriteSheet
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter = VideoToSpriteSheet('', output_dir, frame_size=frame_list[0]['original_size'],
+                                       atlas_size=atlas_size, dedupe=False, low_memory=low_memory)
+        baseline = max_rss_mb()
+        start = time.perf_counter()
+        sheets_info = converter.create_sprite_sheets(frame_list)
+        elapsed = time.perf_counter() - start
+    queue.put((baseline, max_rss_mb(), elapsed, len(sheets_info)))
+
+
+def bench_memory(args):
+    """装箱内存峰值: 全部帧载入内存 vs 低内存流式装箱（每种模式在新进程中运行）"""
+    page_mb = args.atlas_size * args.atlas_size * 4 / (1024 * 1024)
+    frame_mb = args.frame_size * args.frame_size * 4 / (1024 * 1024)
+    print(f"[装箱内存] 帧数: {args.frames}, 帧大小: {args.frame_size}, Atlas: {args.atlas_size} "
+          f"(一页 {page_mb:.0f}MB, 一帧最多 {frame_mb:.1f}MB)")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        frame_list = make_frame_list(work_dir, args.frames, args.frame_size)
+        context = multiprocessing.get_context('spawn')
+        for low_memory in (False, True):
+            queue = context.Queue()
+            output_dir = os.path.join(work_dir, 'stream' if low_memory else 'full')
+            process = context.Process(target=_memory_worker,
+                                      args=(frame_list, output_dir, args.atlas_size, low_memory, queue))
+            process.start()
+            baseline, peak, elapsed, sheets = queue.get()
+            process.join()
+
+            label = '流式装箱' if low_memory else '全部载入'
+            print(f"  {label}: 峰值 {peak:8.1f}MB  装箱增量 {peak - baseline:8.1f}MB  "
+                  f"{sheets} 页  ({elapsed:.2f}s)")
+
+
+def bench_decode(args):
+    """视频解码: 各解码后端的采样吞吐（帧/秒，含缩放到帧大小和转RGB）"""
+    import contextlib
+    import io
+    from decoders import DECODERS, create_decoder
+    from video_probe import VideoProbe
+
+    probe = VideoProbe.open(args.video)
+    print(f"[解码] {args.video}: {probe.width}x{probe.height} {probe.codec}, {probe.fps:.2f}fps, "
+          f"{probe.frame_count} 帧, 帧大小: {args.frame_size}")
+
+    for interval in args.intervals:
+        for name in DECODERS:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    decoder = create_decoder(name, args.video, probe.fps, probe.keyframe_interval())
+            except ValueError as e:
+                print(f"  {name:<7s} 跳过: {e}")
+                continue
+            with decoder:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    count = 0
+                    for _ in decoder.sampled_frames(interval, args.frame_size):
+                        count += 1
+                        if args.max_frames and count >= args.max_frames:
+                            break
+                elapsed = time.perf_counter() - start
+            print(f"  interval={interval:<4d} {name:<7s} {count / elapsed:8.1f} 帧/秒  "
+                  f"({count} 帧, {elapsed:.2f}s)")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='视频转Sprite Sheet工具 - 性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    bg_parser = subparsers.add_parser('bg', help='去背景批量推理吞吐')
+    bg_parser.add_argument('--model', '-m', default='u2net', help='去背景模型 (默认: u2net)')
+    bg_parser.add_argument('--frame-size', '-fs', type=int, default=512, help='帧大小 (默认: 512)')
+    bg_parser.add_argument('--frames', type=int, default=32, help='测试帧数 (默认: 32)')
+    bg_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16],
+                           help='测试的批大小 (默认: 1 4 8 16)')
+    bg_parser.set_defaults(func=bench_bg)
+
+    trim_parser = subparsers.add_parser('trim', help='自动裁剪速度对比')
+    trim_parser.add_argument('--sizes', type=int, nargs='+', default=[256, 512, 1024],
+                             help='测试的帧大小 (默认: 256 512 1024)')
+    trim_parser.add_argument('--repeat', type=int, default=20, help='新实现的重复次数 (默认: 20)')
+    trim_parser.set_defaults(func=bench_trim)
+
+    memory_parser = subparsers.add_parser('memory', help='装箱内存峰值对比（全部载入 vs 流式）')
+    memory_parser.add_argument('--frames', type=int, default=200, help='测试帧数 (默认: 200)')
+    memory_parser.add_argument('--frame-size', '-fs', type=int, default=512, help='帧大小 (默认: 512)')
+    memory_parser.add_argument('--atlas-size', type=int, default=2048, help='Atlas大小 (默认: 2048)')
+    memory_parser.set_defaults(func=bench_memory)
+
+    decode_parser = subparsers.add_parser('decode', help='视频解码吞吐对比（opencv vs pyav）')
+    decode_parser.add_argument('video', help='测试视频路径')
+    decode_parser.add_argument('--frame-size', '-fs', type=int, default=512, help='帧大小 (默认: 512)')
+    decode_parser.add_argument('--intervals', type=int, nargs='+', default=[1, 4],
+                               help='测试的帧间隔 (默认: 1 4)')
+    decode_parser.add_argument('--max-frames', type=int, default=0, help='每次最多采样帧数，0表示不限制 (默认: 0)')
+    decode_parser.set_defaults(func=bench_decode)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
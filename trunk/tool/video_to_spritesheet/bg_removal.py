@@ -0,0 +1,123 @@
+"""
+背景移除 - rembg推理会话管理 & 批量推理引擎
+同一进程内每个模型只加载一次ONNX模型，所有帧、所有视频共享同一个会话
+"""
+
+import threading
+import numpy as np
+from PIL import Image
+from rembg import new_session
+
+
+# 支持的rembg模型
+REMBG_MODELS = ('u2net', 'u2netp', 'isnet-general-use', 'silueta')
+DEFAULT_REMBG_MODEL = 'u2net'
+
+# 各模型的预处理参数: (mean, std, 输入尺寸)，与rembg各Session.predict一致
+MODEL_PREPROCESS = {
+    'u2net': ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225), 320),
+    'u2netp': ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225), 320),
+    'silueta': ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225), 320),
+    'isnet-general-use': ((0.5, 0.5, 0.5), (1.0, 1.0, 1.0), 1024),
+}
+
+# 进程级会话缓存 {模型名: 会话}
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(model_name: str = DEFAULT_REMBG_MODEL):
+    """
+    获取指定模型的rembg会话（首次调用时加载模型，之后直接复用）
+
+    Args:
+        model_name: 模型名（u2net / u2netp / isnet-general-use / silueta）
+    """
+    if model_name not in REMBG_MODELS:
+        raise ValueError(f"不支持的rembg模型: {model_name}（可选: {', '.join(REMBG_MODELS)}）")
+
+    with _sessions_lock:
+        session = _sessions.get(model_name)
+        if session is None:
+            print(f"  加载rembg模型: {model_name}")
+            session = new_session(model_name)
+            _sessions[model_name] = session
+
+    return session
+
+
+class BatchBackgroundRemover:
+    """
+    批量背景移除引擎
+    将K帧预处理成一个NCHW张量，一次ONNX推理得到全部mask，再统一做后处理
+    结果与 rembg.remove(image, session=session) 的默认输出一致（naive cutout）
+    """
+
+    def __init__(self, model_name: str = DEFAULT_REMBG_MODEL, batch_size: int = 4):
+        """
+        Args:
+            model_name: rembg模型名
+            batch_size: 每次推理的帧数
+        """
+        self.model_name = model_name
+        self.batch_size = max(1, int(batch_size))
+        self.session = get_session(model_name)
+        self.mean, self.std, self.input_size = MODEL_PREPROCESS[model_name]
+
+        model_input = self.session.inner_session.get_inputs()[0]
+        self.input_name = model_input.name
+        # 部分导出的ONNX模型把batch维固定为1，此时只能逐帧推理（预处理/后处理仍批量进行）
+        self.fixed_batch = isinstance(model_input.shape[0], int) and model_input.shape[0] == 1
+
+    def preprocess(self, images: list) -> np.ndarray:
+        """把一组PIL图片预处理为 (N, 3, S, S) 的float32张量"""
+        size = (self.input_size, self.input_size)
+        batch = np.stack([
+            np.asarray(img.convert('RGB').resize(size, Image.Resampling.LANCZOS))
+            for img in images
+        ]).astype(np.float32)
+
+        # 每张图各自按最大值归一化
+        batch /= np.maximum(batch.max(axis=(1, 2, 3), keepdims=True), 1e-6)
+        batch -= np.asarray(self.mean, dtype=np.float32)
+        batch /= np.asarray(self.std, dtype=np.float32)
+
+        return np.ascontiguousarray(batch.transpose((0, 3, 1, 2)))
+
+    def infer(self, tensor: np.ndarray) -> np.ndarray:
+        """执行推理，返回 (N, S, S) 的原始预测"""
+        run = self.session.inner_session.run
+        if self.fixed_batch:
+            preds = [run(None, {self.input_name: tensor[i:i + 1]})[0] for i in range(len(tensor))]
+            pred = np.concatenate(preds, axis=0)
+        else:
+            pred = run(None, {self.input_name: tensor})[0]
+        return pred[:, 0, :, :]
+
+    def postprocess(self, images: list, pred: np.ndarray) -> list:
+        """把预测结果归一化为mask，并生成去背景后的RGBA图片"""
+        mi = pred.min(axis=(1, 2), keepdims=True)
+        ma = pred.max(axis=(1, 2), keepdims=True)
+        pred = (pred - mi) / np.maximum(ma - mi, 1e-6)
+        masks = (pred.clip(0, 1) * 255).astype(np.uint8)
+
+        results = []
+        for img, mask in zip(images, masks):
+            mask = Image.fromarray(mask).resize(img.size, Image.Resampling.LANCZOS)
+            alpha = np.asarray(mask, dtype=np.uint16)[:, :, None]
+
+            # naive cutout: RGB与alpha都乘以mask（与rembg的Image.composite结果一致）
+            rgba = np.asarray(img.convert('RGBA'), dtype=np.uint16)
+            cutout = ((rgba * alpha + 127) // 255).astype(np.uint8)
+            results.append(Image.fromarray(cutout))
+
+        return results
+
+    def remove_batch(self, images: list) -> list:
+        """去除一组图片的背景，按batch_size分块推理，返回与输入顺序一致的RGBA图片列表"""
+        results = []
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            pred = self.infer(self.preprocess(chunk))
+            results.extend(self.postprocess(chunk, pred))
+        return results
@@ -0,0 +1,233 @@
+"""
+视频解码后端
+所有解码器实现同一接口: sampled_frames(interval, size, start_time, end_time)
+  -> 逐个产出 (帧号, 时间戳秒, RGB数组 size x size)；指定时间范围时直接定位到起点，到终点即停止解码
+  opencv: cv2.VideoCapture 单线程解码，全分辨率解码后再 cv2.resize
+  pyav:   PyAV（FFmpeg）开启帧/切片多线程解码，由解码器的缩放器（swscale）直接输出目标大小的RGB，
+          时间戳取自帧的PTS
+"""
+
+import math
+import cv2
+
+try:
+    import av
+except ImportError:  # PyAV是可选依赖
+    av = None
+
+
+# 可选的解码后端
+DECODERS = ('opencv', 'pyav')
+DEFAULT_DECODER = 'opencv'
+
+# 不知道视频的关键帧间隔时，帧间隔达到该值才改用定位(seek)采样：
+# 一次seek最多从上一个关键帧解码到目标帧，典型编码的关键帧间隔不超过这个值
+SEEK_MIN_INTERVAL = 120
+
+
+def choose_sampling_strategy(interval: int, keyframe_interval: int = None) -> str:
+    """
+    选择采样方式
+    keyframe_interval: 视频的关键帧间隔（帧数）；帧间隔不小于它时，seek要解码的帧不会比grab跳过的更多
+    返回: 'read'（逐帧解码）/ 'grab'（跳过的帧不取图）/ 'seek'（直接定位到采样帧）
+    """
+    if interval <= 1:
+        return 'read'
+    if interval >= (keyframe_interval or SEEK_MIN_INTERVAL):
+        return 'seek'
+    return 'grab'
+
+
+def time_range_frames(fps: float, start_time: float = 0.0, end_time: float = None) -> tuple:
+    """
+    时间范围 [start_time, end_time) 对应的帧号范围
+    返回: (起始帧号, 结束帧号)；结束帧号不包含在内，end_time为None时为None（到视频结尾）
+    """
+    # 先按微秒取整，避免 0.1*30 这类浮点误差多算或少算一帧
+    start_frame = max(0, math.ceil(round(start_time * fps, 6)))
+    end_frame = None if end_time is None else max(start_frame, math.ceil(round(end_time * fps, 6)))
+    return start_frame, end_frame
+
+
+class FrameDecoder:
+    """解码器基类（可用作上下文管理器，退出时关闭视频）"""
+
+    name = None
+
+    def __init__(self, video_path: str, fps: float, keyframe_interval: int = None):
+        """
+        Args:
+            video_path: 视频文件路径
+            fps: 视频帧率（用于帧号与时间的换算）
+            keyframe_interval: 关键帧间隔（帧数，来自 VideoProbe），决定何时改用seek采样；None时用固定阈值
+        """
+        self.video_path = video_path
+        self.fps = fps
+        self.keyframe_interval = keyframe_interval
+
+    def sampled_frames(self, interval: int, size: int, start_time: float = 0.0, end_time: float = None):
+        """
+        从 start_time 起每 interval 帧取一帧，缩放到 size x size，到 end_time（不含）为止
+        产出: (帧号, 时间戳秒, RGB数组)，帧号和时间戳都从视频开头算起
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """释放视频"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OpenCVDecoder(FrameDecoder):
+    """cv2.VideoCapture 解码（原有实现）"""
+
+    name = 'opencv'
+
+    def __init__(self, video_path: str, fps: float, keyframe_interval: int = None):
+        super().__init__(video_path, fps, keyframe_interval)
+        self.vidcap = cv2.VideoCapture(video_path)
+        if not self.vidcap.isOpened():
+            raise ValueError(f"无法打开视频: {video_path}")
+
+    def sampled_frames(self, interval: int, size: int, start_time: float = 0.0, end_time: float = None):
+        strategy = choose_sampling_strategy(interval, self.keyframe_interval)
+        print(f"  采样方式: {strategy}")
+
+        vidcap = self.vidcap
+        start_frame, end_frame = time_range_frames(self.fps, start_time, end_time)
+        if start_frame > 0 and not vidcap.set(cv2.CAP_PROP_POS_FRAMES, start_frame):
+            # 无法定位时只能从头跳过
+            print("  定位失败，从头跳过到起始帧")
+            for _ in range(start_frame):
+                if not vidcap.grab():
+                    return
+
+        count = start_frame
+        while end_frame is None or count < end_frame:
+            if strategy == 'seek' and count > start_frame:
+                # 定位失败（部分容器不支持）时退回grab方式
+                if not vidcap.set(cv2.CAP_PROP_POS_FRAMES, count):
+                    print("  定位失败，改用grab方式")
+                    strategy = 'grab'
+                    for _ in range(interval - 1):
+                        if not vidcap.grab():
+                            return
+
+            success, image = vidcap.read()
+            if not success:
+                return
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            yield count, count / self.fps, cv2.resize(image, (size, size))
+
+            if strategy == 'grab':
+                # 跳过的帧只grab，不做颜色转换和取图
+                for _ in range(interval - 1):
+                    if not vidcap.grab():
+                        return
+
+            count += interval
+
+    def close(self):
+        self.vidcap.release()
+
+
+class PyAVDecoder(FrameDecoder):
+    """PyAV解码：多线程解码，缩放和转RGB由swscale一步完成，只对采样帧做转换"""
+
+    name = 'pyav'
+
+    def __init__(self, video_path: str, fps: float, keyframe_interval: int = None, threads: int = 0):
+        """
+        Args:
+            threads: 解码线程数，0表示由FFmpeg按CPU核数自动决定
+        """
+        super().__init__(video_path, fps, keyframe_interval)
+        if av is None:
+            raise ValueError("PyAV未安装，无法使用pyav解码器（pip install av）")
+        try:
+            self.container = av.open(video_path)
+        except av.error.FFmpegError as e:
+            raise ValueError(f"无法打开视频: {video_path} ({e})") from e
+        if not self.container.streams.video:
+            self.container.close()
+            raise ValueError(f"没有视频流: {video_path}")
+
+        self.stream = self.container.streams.video[0]
+        # 帧级+切片级多线程
+        self.stream.thread_type = 'AUTO'
+        self.stream.codec_context.thread_count = threads
+        self.start_pts = self.stream.start_time or 0
+
+    def frame_time(self, frame) -> float:
+        """帧相对视频开头的时间（秒）"""
+        return float((frame.pts - self.start_pts) * self.stream.time_base)
+
+    def frame_index(self, frame) -> int:
+        """由PTS换算帧号"""
+        return int(round(self.frame_time(frame) * self.fps))
+
+    def to_rgb(self, frame, size: int):
+        """由解码器的缩放器直接输出 size x size 的RGB数组"""
+        return frame.to_ndarray(width=size, height=size, format='rgb24')
+
+    def seek_to_frame(self, index: int):
+        """定位到该帧之前（含）最近的关键帧，之后的decode从那里开始"""
+        offset = int(index / self.fps / self.stream.time_base)
+        self.container.seek(self.start_pts + offset, stream=self.stream, backward=True)
+
+    def sampled_frames(self, interval: int, size: int, start_time: float = 0.0, end_time: float = None):
+        strategy = 'seek' if choose_sampling_strategy(interval, self.keyframe_interval) == 'seek' else 'read'
+        print(f"  采样方式: {strategy} (PyAV, {self.stream.codec_context.name})")
+
+        start_frame, end_frame = time_range_frames(self.fps, start_time, end_time)
+        if strategy == 'seek':
+            yield from self._seek_frames(interval, size, start_frame, end_frame)
+            return
+
+        # 顺序解码：非采样帧仍需解码（后续帧依赖它们），但不做缩放和颜色转换
+        if start_frame > 0:
+            self.seek_to_frame(start_frame)
+        count = 0
+        for frame in self.container.decode(self.stream):
+            if start_frame > 0 and self.frame_index(frame) < start_frame:
+                continue  # 关键帧到起点之间的帧
+            index = start_frame + count
+            if end_frame is not None and index >= end_frame:
+                return
+            if count % interval == 0:
+                yield index, self.frame_time(frame), self.to_rgb(frame, size)
+            count += 1
+
+    def _seek_frames(self, interval: int, size: int, start_frame: int, end_frame: int):
+        """采样间隔很大时：每个采样帧先定位到之前的关键帧，再解码到目标帧"""
+        target = start_frame
+        while end_frame is None or target < end_frame:
+            self.seek_to_frame(target)
+            found = None
+            for frame in self.container.decode(self.stream):
+                index = self.frame_index(frame)
+                if index >= target:
+                    found = (index, frame)
+                    break
+            if found is None or (end_frame is not None and found[0] >= end_frame):
+                return
+            index, frame = found
+            yield index, self.frame_time(frame), self.to_rgb(frame, size)
+            # 按实际解码到的帧继续，避免重复产出同一帧
+            target = index + interval
+
+    def close(self):
+        self.container.close()
+
+
+def create_decoder(name: str, video_path: str, fps: float, keyframe_interval: int = None) -> FrameDecoder:
+    """按名称创建解码器；无法打开视频时抛出ValueError"""
+    if name == 'opencv':
+        return OpenCVDecoder(video_path, fps, keyframe_interval)
+    if name == 'pyav':
+        return PyAVDecoder(video_path, fps, keyframe_interval)
+    raise ValueError(f"不支持的解码器: {name}（可选: {', '.join(DECODERS)}）")
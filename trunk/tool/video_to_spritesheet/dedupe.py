@@ -0,0 +1,69 @@
+"""
+重复帧检测
+待机、循环动作中常有像素完全相同或几乎相同的裁剪帧，这些帧在图集中只需要存一份，
+元数据里的多个帧名指向同一个frame矩形即可
+"""
+
+import hashlib
+import numpy as np
+from PIL import Image
+
+
+# 感知哈希的边长（dHash共 DHASH_SIZE * DHASH_SIZE 位）
+DHASH_SIZE = 8
+
+
+def exact_hash(image: Image.Image) -> str:
+    """裁剪后RGBA图像的精确哈希（包含尺寸）"""
+    sha = hashlib.sha1(f"{image.width}x{image.height}".encode())
+    sha.update(image.tobytes())
+    return sha.hexdigest()
+
+
+def dhash(image: Image.Image, hash_size: int = DHASH_SIZE) -> int:
+    """
+    差值感知哈希（dHash）
+    在透明背景下按alpha预乘的灰度计算，缩放到 (hash_size+1) x hash_size 后比较相邻像素亮度
+    """
+    rgba = np.asarray(image.convert('RGBA'), dtype=np.float32)
+    gray = (rgba[:, :, 0] * 0.299 + rgba[:, :, 1] * 0.587 + rgba[:, :, 2] * 0.114) * rgba[:, :, 3] / 255
+    small = Image.fromarray(gray.astype(np.uint8)).resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def find_duplicates(images: list, threshold: int = 0) -> list:
+    """
+    查找重复帧
+    Args:
+        images: 裁剪后的RGBA图像（列表或逐张加载的迭代器，每张图只使用一次，不会被保留）
+        threshold: 近似重复的dHash汉明距离阈值（0表示只合并像素完全相同的帧）；
+                   只有尺寸相同的帧才会被合并，这样才能共用同一个frame矩形
+    返回: 与images一一对应的下标列表，第i项是第i帧保留副本的下标（唯一帧为自身）
+    """
+    canonical = []
+    exact = {}
+    # 按尺寸分组的近似比较候选 {(w, h): [(dhash, 下标), ...]}
+    candidates = {}
+
+    for i, image in enumerate(images):
+        key = exact_hash(image)
+        if key in exact:
+            canonical.append(exact[key])
+            continue
+
+        if threshold > 0:
+            phash = dhash(image)
+            group = candidates.setdefault(image.size, [])
+            match = next((j for h, j in group if bin(h ^ phash).count('1') <= threshold), None)
+            if match is not None:
+                canonical.append(match)
+                exact[key] = match
+                continue
+            group.append((phash, i))
+
+        exact[key] = i
+        canonical.append(i)
+
+    return canonical
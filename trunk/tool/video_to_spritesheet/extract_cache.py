@@ -0,0 +1,182 @@
+"""
+帧提取缓存
+以"视频内容 + 提取参数"为键缓存去背景并裁剪后的帧，视频和参数都没变时直接恢复frame_list，
+不再重新解码和去背景。缓存按总大小做LRU淘汰。
+已有帧文件的帧直接复制PNG；只在内存中的帧存为RGBA原始像素（.rgba），写入和读取都不做PNG编解码
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from PIL import Image
+
+
+# 缓存目录名（位于输出目录下）
+CACHE_DIR_NAME = '.cache'
+# 缓存格式版本，提取算法改变导致结果不同时递增，使旧缓存失效
+CACHE_VERSION = 2
+# 默认缓存上限（字节）
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# 计算视频指纹时采样的块大小（头、中、尾各一块）
+_FINGERPRINT_CHUNK = 1024 * 1024
+_MANIFEST_NAME = 'manifest.json'
+# 最近这么多秒内读写过的条目不淘汰（可能正被另一个提取任务读取）
+_EVICT_GRACE_SECONDS = 60
+
+
+def video_fingerprint(video_path: str) -> str:
+    """
+    计算视频内容指纹：文件大小 + 头/中/尾各1MB的哈希
+    对大文件也只读3MB，与文件名和修改时间无关（复制、改名后仍能命中）
+    """
+    size = os.path.getsize(video_path)
+    sha = hashlib.sha1(str(size).encode())
+
+    with open(video_path, 'rb') as f:
+        if size <= _FINGERPRINT_CHUNK * 3:
+            sha.update(f.read())
+        else:
+            for offset in (0, size // 2, size - _FINGERPRINT_CHUNK):
+                f.seek(offset)
+                sha.update(f.read(_FINGERPRINT_CHUNK))
+
+    return sha.hexdigest()
+
+
+class ExtractionCache:
+    """
+    磁盘上的提取结果缓存
+    每个条目是一个目录: <缓存目录>/<键>/manifest.json + 00000.png / 00000.rgba ...
+    条目的最近使用时间记录在manifest的mtime上
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, video_path: str, params: dict) -> str:
+        """由视频指纹和提取参数生成缓存键"""
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'video': video_fingerprint(video_path),
+            'params': params
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def load(self, key: str) -> list:
+        """
+        读取缓存条目
+        返回: 帧信息列表（'path'指向缓存中的帧文件，用 load_image 读取），未命中返回None
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry_dir, _MANIFEST_NAME)
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                frames = json.load(f)['frames']
+            # 先更新最近使用时间，读取期间淘汰不会删除该条目
+            os.utime(manifest_path, None)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        for frame in frames:
+            frame['path'] = os.path.join(entry_dir, frame['file'])
+            if not os.path.exists(frame['path']):
+                return None
+
+        return frames
+
+    def store(self, key: str, frame_list: list):
+        """
+        写入缓存条目（先写临时目录再原子替换），然后按上限淘汰旧条目
+        并行的提取任务可能同时写同一个键：已有完整条目时直接保留它，丢弃本次写入
+        """
+        if not frame_list:
+            return
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.isfile(os.path.join(entry_dir, _MANIFEST_NAME)):
+            return
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}-{time.time_ns()}"
+        os.makedirs(tmp_dir)
+
+        try:
+            frames = []
+            for frame_info in frame_list:
+                entry = {k: v for k, v in frame_info.items() if k not in ('path', 'image', 'name', 'action')}
+                if 'path' in frame_info:
+                    file_name = f"{frame_info['index']:05d}.png"
+                    shutil.copyfile(frame_info['path'], os.path.join(tmp_dir, file_name))
+                else:
+                    # 只在内存中的帧（未写frames/*.png）：直接写原始像素，不做PNG编码
+                    image = frame_info['image']
+                    if image.mode != 'RGBA':
+                        image = image.convert('RGBA')
+                    file_name = f"{frame_info['index']:05d}.rgba"
+                    with open(os.path.join(tmp_dir, file_name), 'wb') as f:
+                        f.write(image.tobytes())
+                    entry['raw_size'] = list(image.size)
+                entry['file'] = file_name
+                frames.append(entry)
+
+            with open(os.path.join(tmp_dir, _MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump({'frames': frames}, f, ensure_ascii=False)
+
+            # 残缺的旧条目（没有manifest）才删除；完整条目说明另一个任务刚写入了同样的结果
+            if os.path.exists(entry_dir) and not os.path.isfile(os.path.join(entry_dir, _MANIFEST_NAME)):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # 目标目录非空：另一个任务抢先写入，缓存结果相同，丢弃本次写入
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self.evict()
+
+    @staticmethod
+    def load_image(frame: dict) -> Image.Image:
+        """读取 load() 返回的一帧为RGBA图像（原始像素文件直接读入，不解码）"""
+        if 'raw_size' in frame:
+            with open(frame['path'], 'rb') as f:
+                return Image.frombytes('RGBA', tuple(frame['raw_size']), f.read())
+        with Image.open(frame['path']) as image:
+            return image.convert('RGBA')
+
+    def evict(self):
+        """
+        总大小超过上限时，按最近使用时间从旧到新删除条目
+        正在写入的临时目录和最近读写过的条目不删除（可能正被并行的提取任务使用）
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if '.tmp-' in name:
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            manifest_path = os.path.join(entry_dir, _MANIFEST_NAME)
+            try:
+                mtime = os.path.getmtime(manifest_path)
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+            except OSError:
+                continue  # 不是条目，或者刚被另一个任务删除
+            entries.append((mtime, size, entry_dir))
+            total += size
+
+        recent = time.time() - _EVICT_GRACE_SECONDS
+        for mtime, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if mtime >= recent:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            print(f"  缓存淘汰: {os.path.basename(entry_dir)} ({size / 1024 / 1024:.1f}MB)")
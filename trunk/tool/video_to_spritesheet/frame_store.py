@@ -0,0 +1,102 @@
+"""
+帧存储
+所有帧的RGBA原始像素连续存放在一个文件中，另有内存中的偏移索引（键 -> 偏移、宽、高），
+读取时通过mmap切片，不解码PNG、不复制像素（可直接包装成PIL图像或QImage）
+文件默认是匿名临时文件，关闭或进程退出后自动删除
+"""
+
+import mmap
+import tempfile
+import threading
+from PIL import Image
+
+
+class FrameStore:
+    """
+    内存映射的帧存储（线程安全，可在多个提取线程中同时写入）
+    同一个键再次写入时，新图不大于原有空间则原地覆盖，否则追加到文件末尾（旧空间不再使用）
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: 存储文件路径，None表示使用匿名临时文件
+        """
+        if path is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            self.file = open(path, 'w+b')
+        self.index = {}  # 键 -> (偏移, 宽, 高, 占用字节数)
+        self.end = 0
+        self.lock = threading.Lock()
+        self.map = None
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def put(self, key, image: Image.Image):
+        """写入一帧（转为RGBA原始像素）"""
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        data = image.tobytes()
+
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is not None and len(data) <= entry[3]:
+                offset, capacity = entry[0], entry[3]
+            else:
+                offset, capacity = self.end, len(data)
+                self.end += capacity
+            # 映射区已经覆盖的位置直接写映射内存（已有的视图立即看到新内容），其余写文件
+            if self.map is not None and offset + len(data) <= len(self.map):
+                self.map[offset:offset + len(data)] = data
+            else:
+                self.file.seek(offset)
+                self.file.write(data)
+            self.index[key] = (offset, image.width, image.height, capacity)
+
+    def put_file(self, key, path: str):
+        """从图片文件解码一帧并写入"""
+        with Image.open(path) as image:
+            self.put(key, image.convert('RGBA'))
+
+    def size(self, key) -> tuple:
+        """帧大小 (宽, 高)"""
+        _, width, height, _ = self.index[key]
+        return width, height
+
+    def view(self, key) -> tuple:
+        """
+        零拷贝读取一帧
+        返回: (memoryview, 宽, 高)，每行 宽*4 字节；视图在存储关闭前一直有效
+        """
+        with self.lock:
+            offset, width, height, _ = self.index[key]
+            if width == 0 or height == 0:
+                return memoryview(b''), width, height
+            if self.map is None or len(self.map) < self.end:
+                # 文件变长后重新映射；旧映射可能仍被视图引用，交给垃圾回收释放
+                self.file.flush()
+                self.map = mmap.mmap(self.file.fileno(), self.end)
+            return memoryview(self.map)[offset:offset + width * height * 4], width, height
+
+    def image(self, key) -> Image.Image:
+        """零拷贝读取一帧为PIL图像（共享存储内存，只读使用）"""
+        data, width, height = self.view(key)
+        if width == 0 or height == 0:
+            return Image.new('RGBA', (width, height))
+        return Image.frombuffer('RGBA', (width, height), data, 'raw', 'RGBA', 0, 1)
+
+    def close(self):
+        """关闭存储文件（之后不能再读取视图）"""
+        with self.lock:
+            self.map = None
+            self.index.clear()
+            self.file.close()
+
+    def nbytes(self) -> int:
+        """存储文件大小（字节）"""
+        return self.end
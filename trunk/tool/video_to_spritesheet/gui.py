@@ -11,15 +11,24 @@ from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QSpinBox, QDoubleSpinBox, QComboBox, QPushButton, QFileDialog,
     QProgressBar, QMessageBox, QGroupBox, QFormLayout, QTextEdit,
-    QSlider, QTabWidget, QRadioButton, QButtonGroup, QDialog, QScrollArea, QGridLayout,
-    QListWidget, QListWidgetItem
+    QSlider, QRadioButton, QButtonGroup, QDialog, QScrollArea,
+    QListWidget, QListWidgetItem, QCheckBox, QListView
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QRect, QPoint
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QIcon
-from PIL import Image
+from PyQt5.QtCore import (
+    Qt, QThread, pyqtSignal, QTimer, QRect, QObject, QRunnable, QThreadPool,
+    QAbstractListModel, QModelIndex, QSize
+)
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QPixmapCache, QTransform
+import threading
 import traceback
 
-from main import VideoToSpriteSheet
+from main import VideoToSpriteSheet, ExtractionCancelled
+from frame_store import FrameStore
+from video_probe import VideoProbe
+from bg_removal import REMBG_MODELS, DEFAULT_REMBG_MODEL
+from decoders import DECODERS, DEFAULT_DECODER, time_range_frames
+from packers import PACKERS, DEFAULT_PACKER
+from texture_export import TEXTURE_FORMATS, DEFAULT_TEXTURE_FORMAT, PNG_PROFILES, DEFAULT_PNG_PROFILE
 
 
 class RangeSlider(QWidget):
@@ -151,13 +160,14 @@ class RangeSlider(QWidget):
 
 class FrameEditorDialog(QDialog):
     """Frame trim editor dialog with slider controls"""
-    def __init__(self, frame_path, trim_info, original_size, parent=None):
+    def __init__(self, frame_image, frame_name, trim_info, original_size, source_rect=None, parent=None):
         super().__init__(parent)
-        self.frame_path = frame_path
+        self.frame_image = frame_image  # QImage of the stored (untouched) frame pixels
+        self.source_rect = source_rect or trim_info  # Where those pixels sit in the full frame
         self.trim_info = trim_info.copy()
         self.original_size = original_size
         
-        self.setWindowTitle(f"Edit Frame - {os.path.basename(frame_path)}")
+        self.setWindowTitle(f"Edit Frame - {frame_name}")
         self.setModal(True)
         self.resize(900, 700)
         
@@ -172,22 +182,16 @@ class FrameEditorDialog(QDialog):
         self.update_slider_sizes()
     
     def load_image(self):
-        """Load frame image"""
-        # Load trimmed frame
-        frame_img = Image.open(self.frame_path)
-        if frame_img.mode != 'RGBA':
-            frame_img = frame_img.convert('RGBA')
-        
-        # Create canvas with original size and gray background
-        canvas = Image.new('RGBA', (self.original_size, self.original_size), (200, 200, 200, 255))
+        """Compose the trimmed frame onto a gray full-size canvas"""
+        canvas = QImage(self.original_size, self.original_size, QImage.Format_RGBA8888)
+        canvas.fill(QColor(200, 200, 200))
         
-        # Paste trimmed frame at trim position
-        canvas.paste(frame_img, (self.trim_info['x'], self.trim_info['y']), frame_img)
+        # Draw the stored pixels at their source position (alpha blended), so a trim can grow back
+        painter = QPainter(canvas)
+        painter.drawImage(self.source_rect['x'], self.source_rect['y'], self.frame_image)
+        painter.end()
         
-        # Convert to QPixmap
-        data = canvas.tobytes('raw', 'RGBA')
-        qimg = QImage(data, canvas.width, canvas.height, QImage.Format_RGBA8888)
-        self.canvas_pixmap = QPixmap.fromImage(qimg)
+        self.canvas_pixmap = QPixmap.fromImage(canvas)
     
     def init_ui(self):
         """Initialize UI with range sliders"""
@@ -302,26 +306,67 @@ class FrameEditorDialog(QDialog):
     def get_trim_info(self):
         """Get updated trim info"""
         return self.trim_info
+
+
+class VideoRangeDialog(QDialog):
+    """Pick the time range of a video to extract (end 0 = until the end of the video)"""
+    def __init__(self, video_name, duration, start_time=0.0, end_time=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Time Range - {video_name}")
+        self.setModal(True)
+        
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        
+        self.start_spinbox = QDoubleSpinBox()
+        self.start_spinbox.setDecimals(2)
+        self.start_spinbox.setSuffix(" s")
+        self.start_spinbox.setRange(0.0, duration)
+        self.start_spinbox.setValue(start_time)
+        form.addRow("Start:", self.start_spinbox)
+        
+        self.end_spinbox = QDoubleSpinBox()
+        self.end_spinbox.setDecimals(2)
+        self.end_spinbox.setSuffix(" s")
+        self.end_spinbox.setRange(0.0, duration)
+        self.end_spinbox.setSpecialValueText("End of video")
+        self.end_spinbox.setValue(end_time or 0.0)
+        form.addRow("End:", self.end_spinbox)
+        
+        layout.addLayout(form)
+        layout.addWidget(QLabel(f"Duration: {duration:.2f}s"))
+        
+        button_layout = QHBoxLayout()
+        ok_btn = QPushButton("OK")
+        ok_btn.clicked.connect(self.accept)
+        reset_btn = QPushButton("Whole Video")
+        reset_btn.clicked.connect(self.reset_range)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addStretch()
+        button_layout.addWidget(reset_btn)
+        button_layout.addWidget(ok_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def reset_range(self):
+        """Select the whole video"""
+        self.start_spinbox.setValue(0.0)
+        self.end_spinbox.setValue(0.0)
+    
+    def accept(self):
+        """Reject ranges whose end is not after the start"""
+        end = self.end_spinbox.value()
+        if end and end <= self.start_spinbox.value():
+            QMessageBox.warning(self, "Error", "End time must be after the start time")
+            return
+        super().accept()
     
-    def save_cropped_frame(self):
-        """Save the re-cropped frame based on new trim info"""
-        # Crop the new trim area from the canvas
-        # The canvas has the original image pasted at the old trim position
-        # We need to crop the new trim rectangle
-        canvas_img = Image.open(self.frame_path)
-        if canvas_img.mode != 'RGBA':
-            canvas_img = canvas_img.convert('RGBA')
-        
-        # Create full-size canvas
-        full_canvas = Image.new('RGBA', (self.original_size, self.original_size), (0, 0, 0, 0))
-        
-        # We need to get the original untrimmed frame
-        # Since we only have the trimmed frame, we need to work differently
-        # Just crop the new area directly and save
-        
-        # For now, we'll update the trim_info and let the sprite sheet generation handle it
-        # The trim_info update is enough because generate_spritesheet will use it
-        pass
+    def get_range(self):
+        """(start_time, end_time); end_time is None for the end of the video"""
+        return self.start_spinbox.value(), self.end_spinbox.value() or None
 
 
 class ConversionWorker(QThread):
@@ -343,6 +388,232 @@ class ConversionWorker(QThread):
             self.finished.emit(False, f"Error: {str(e)}\n{traceback.format_exc()}")
 
 
+class ExtractionSignals(QObject):
+    """Signals emitted by an ExtractionJob (QRunnable cannot emit signals itself)"""
+    progress = pyqtSignal(str, int, int)  # video_path, done, total
+    finished = pyqtSignal(str, list)  # video_path, frames
+    failed = pyqtSignal(str, str)  # video_path, error message
+    cancelled = pyqtSignal(str)  # video_path
+
+
+class ExtractionJob(QRunnable):
+    """Extracts the frames of one video on a QThreadPool worker thread"""
+    
+    def __init__(self, converter, cancel_event, frame_store):
+        super().__init__()
+        self.converter = converter
+        self.cancel_event = cancel_event
+        self.frame_store = frame_store
+        self.signals = ExtractionSignals()
+    
+    def run(self):
+        video_path = self.converter.video_path
+        try:
+            if self.cancel_event.is_set():
+                raise ExtractionCancelled(video_path)
+            # Frames processed in this process go into the shared store straight from memory
+            stored = set()
+            
+            def store_frame(frame_info, image):
+                self.frame_store.put(frame_info['name'], image)
+                stored.add(frame_info['name'])
+            
+            frames = self.converter.extract_frames(
+                progress_callback=lambda done, total: self.signals.progress.emit(video_path, done, total),
+                cancel_check=self.cancel_event.is_set,
+                frame_callback=store_frame
+            )
+            # Cache hits (and worker-process frames) are decoded once from their PNG;
+            # the views slice the store without decoding again
+            for frame_info in frames:
+                if frame_info['name'] not in stored:
+                    self.frame_store.put_file(frame_info['name'], frame_info['path'])
+            self.signals.finished.emit(video_path, frames)
+        except ExtractionCancelled:
+            self.signals.cancelled.emit(video_path)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(video_path, str(e))
+
+
+# Thumbnail grid cell size (px)
+THUMBNAIL_SIZE = 80
+
+
+class ThumbnailSignals(QObject):
+    """Signals emitted by ThumbnailJob"""
+    ready = pyqtSignal(str, int, QImage)  # frame name, revision, thumbnail
+
+
+class ThumbnailJob(QRunnable):
+    """Builds one frame thumbnail on a QThreadPool worker thread"""
+    
+    def __init__(self, signals, make_thumbnail, frame_info, revision):
+        super().__init__()
+        self.signals = signals
+        self.make_thumbnail = make_thumbnail
+        # Snapshot, so a trim edit on the UI thread cannot change the frame mid-decode
+        self.frame_info = dict(frame_info)
+        self.revision = revision
+    
+    def run(self):
+        try:
+            image = self.make_thumbnail(self.frame_info)
+        except Exception:
+            traceback.print_exc()
+            return
+        self.signals.ready.emit(self.frame_info['name'], self.revision, image)
+
+
+class FrameThumbnailModel(QAbstractListModel):
+    """
+    List model over the extracted frames for the thumbnail grid
+    Thumbnails are requested only when the view asks for a row's icon (i.e. the row is visible),
+    built on a thread pool, and cached until that frame is replaced or edited
+    """
+    
+    def __init__(self, make_thumbnail, pool, parent=None):
+        super().__init__(parent)
+        self.make_thumbnail = make_thumbnail
+        self.pool = pool
+        self.frames = []
+        self.rows = {}  # frame name -> row
+        self.thumbnails = {}  # frame name -> (frame info, revision, QPixmap or None while pending)
+        self.revision = 0
+        self.signals = ThumbnailSignals()
+        self.signals.ready.connect(self.on_thumbnail_ready)
+        
+        self.placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor(220, 220, 220))
+    
+    def set_frames(self, frames):
+        """Replace the frame list; thumbnails of frames that are still the same objects are kept"""
+        self.beginResetModel()
+        self.frames = list(frames)
+        self.rows = {frame_info['name']: row for row, frame_info in enumerate(self.frames)}
+        self.thumbnails = {
+            name: cached for name, cached in self.thumbnails.items()
+            if name in self.rows and self.frames[self.rows[name]] is cached[0]
+        }
+        self.endResetModel()
+    
+    def refresh_frame(self, row):
+        """Drop one frame's thumbnail so it is rebuilt (e.g. after a trim edit)"""
+        self.thumbnails.pop(self.frames[row]['name'], None)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.frames)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        frame_info = self.frames[index.row()]
+        if role == Qt.ToolTipRole:
+            return frame_info.get('name', f"Frame {index.row()}")
+        if role == Qt.DecorationRole:
+            cached = self.thumbnails.get(frame_info['name'])
+            if cached is None:
+                self.request_thumbnail(frame_info)
+                return self.placeholder
+            return cached[2] or self.placeholder
+        return None
+    
+    def request_thumbnail(self, frame_info):
+        self.revision += 1
+        self.thumbnails[frame_info['name']] = (frame_info, self.revision, None)
+        self.pool.start(ThumbnailJob(self.signals, self.make_thumbnail, frame_info, self.revision))
+    
+    def on_thumbnail_ready(self, name, revision, image):
+        cached = self.thumbnails.get(name)
+        if cached is None or cached[1] != revision:
+            return  # Frame was replaced or edited while this thumbnail was being built
+        self.thumbnails[name] = (cached[0], revision, QPixmap.fromImage(image))
+        index = self.index(self.rows[name])
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class AtlasPreview:
+    """
+    Animation preview backed by the generated atlas: each page is decoded once and frames are
+    sliced from it; display-scaled frames live in the global LRU QPixmapCache (bounded memory)
+    """
+    
+    def __init__(self, display_height=400):
+        self.display_height = display_height
+        self.output_dir = None
+        self.frames = {}  # frame name -> TexturePacker frame entry
+        self.page_files = []
+        self.pages = {}  # page image file -> decoded QImage
+        self.premultiplied = False
+        self.generation = 0  # part of the cache key, so frames of an older atlas are never reused
+    
+    def load(self, output_dir):
+        """(Re)load spritesheet.json of an output directory; pages are decoded lazily"""
+        with open(os.path.join(output_dir, 'spritesheet.json'), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        meta = metadata.get('meta', {})
+        self.output_dir = output_dir
+        self.frames = metadata.get('frames', {})
+        self.page_files = [page['image'] for page in meta.get('pages', [])] or [meta.get('image')]
+        self.pages = {}
+        self.premultiplied = meta.get('premultipliedAlpha', False)
+        self.generation += 1
+    
+    def is_loaded(self, output_dir):
+        return self.output_dir == output_dir and bool(self.frames)
+    
+    def page(self, image_file):
+        """Decoded atlas page (decoded on first use only)"""
+        if image_file not in self.pages:
+            image = QImage(os.path.join(self.output_dir, image_file)).convertToFormat(QImage.Format_ARGB32)
+            if self.premultiplied:
+                # The PNG already stores premultiplied colors; tell Qt instead of multiplying again
+                image.reinterpretAsFormat(QImage.Format_ARGB32_Premultiplied)
+            self.pages[image_file] = image
+        return self.pages[image_file]
+    
+    def frame_pixmap(self, name):
+        """One frame restored to its source size and scaled for display"""
+        key = f"atlas-preview:{self.generation}:{self.display_height}:{name}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        
+        entry = self.frames[name]
+        rect = entry['frame']
+        page = self.page(entry.get('image') or self.page_files[0])
+        if entry.get('rotated'):
+            # Stored rotated 90 deg clockwise (occupies h x w on the page): slice and rotate back
+            sliced = page.copy(rect['x'], rect['y'], rect['h'], rect['w']).transformed(QTransform().rotate(-90))
+        else:
+            sliced = page.copy(rect['x'], rect['y'], rect['w'], rect['h'])
+        
+        source_size = entry['sourceSize']
+        sprite_source_size = entry['spriteSourceSize']
+        canvas = QImage(source_size['w'], source_size['h'], QImage.Format_ARGB32_Premultiplied)
+        canvas.fill(Qt.transparent)
+        painter = QPainter(canvas)
+        painter.drawImage(sprite_source_size['x'], sprite_source_size['y'], sliced)
+        painter.end()
+        
+        pixmap = QPixmap.fromImage(canvas).scaledToHeight(self.display_height, Qt.SmoothTransformation)
+        QPixmapCache.insert(key, pixmap)
+        return pixmap
+    
+    def frame_pixmaps(self, names):
+        return [self.frame_pixmap(name) for name in names]
+    
+    def action_frames(self, action_name):
+        """Display frames of one action in frame-name order"""
+        names = sorted(
+            name for name, entry in self.frames.items()
+            if (entry.get('action') or name.rsplit('_', 1)[0]) == action_name
+        )
+        return self.frame_pixmaps(names)
+
+
 class VideoToSpriteSheetGUI(QMainWindow):
     """Main window"""
     
@@ -351,7 +622,26 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.config = self.load_config()
         self.video_paths = []
         self.selected_videos = set()  # Track which videos are selected for extraction
+        self.video_ranges = {}  # Video path -> (start_time, end_time) to extract; missing = whole video
         self.extracted_videos = set()  # Track which videos have been extracted
+        
+        # Parallel extraction jobs
+        self.extraction_pool = QThreadPool()
+        self.extraction_pool.setMaxThreadCount(
+            self.config.get('parallel_extractions', min(4, os.cpu_count() or 1))
+        )
+        self.extraction_cancel = threading.Event()
+        self.extraction_jobs = {}  # video_path -> ExtractionJob
+        self.extraction_progress = {}  # video_path -> (done, total)
+        self.extraction_failures = []
+        
+        # Raw RGBA pixels of every extracted frame in one memory-mapped file
+        self.frame_store = FrameStore()
+        
+        # Atlas-backed animation preview; scaled frames are kept in a bounded LRU pixmap cache
+        QPixmapCache.setCacheLimit(self.config.get('preview_cache_mb', 64) * 1024)
+        self.atlas_preview = AtlasPreview()
+        
         self.init_ui()
         self.setAcceptDrops(True)
     
@@ -390,6 +680,7 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.video_list = QListWidget()
         self.video_list.setMinimumHeight(100)
         self.video_list.itemChanged.connect(self.on_video_selection_changed)
+        self.video_list.itemDoubleClicked.connect(self.edit_video_range)
         video_layout.addWidget(self.video_list)
         
         button_layout = QHBoxLayout()
@@ -397,6 +688,11 @@ class VideoToSpriteSheetGUI(QMainWindow):
         browse_btn.clicked.connect(self.browse_video)
         button_layout.addWidget(browse_btn)
         
+        range_btn = QPushButton("Set Range")
+        range_btn.setToolTip("Extract only part of the selected video (or double-click it)")
+        range_btn.clicked.connect(lambda: self.edit_video_range(self.video_list.currentItem()))
+        button_layout.addWidget(range_btn)
+        
         clear_btn = QPushButton("Clear All")
         clear_btn.clicked.connect(self.clear_videos)
         button_layout.addWidget(clear_btn)
@@ -424,6 +720,73 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.atlas_size_spinbox.setSingleStep(256)
         param_layout.addRow("Atlas Size (px):", self.atlas_size_spinbox)
         
+        # Bin-packing algorithm for sprite sheet generation
+        self.packer_combo = QComboBox()
+        self.packer_combo.addItems(PACKERS)
+        self.packer_combo.setCurrentText(self.config.get('default_packer', DEFAULT_PACKER))
+        param_layout.addRow("Packer:", self.packer_combo)
+        
+        # Let the packer rotate frames 90 degrees (client must honour 'rotated')
+        self.allow_rotation_checkbox = QCheckBox("Allow 90° rotation")
+        self.allow_rotation_checkbox.setChecked(self.config.get('default_allow_rotation', False))
+        param_layout.addRow("Rotation:", self.allow_rotation_checkbox)
+        
+        # Gap between frames and edge-pixel extrusion (lets the client use linear filtering / mipmaps)
+        self.padding_spinbox = QSpinBox()
+        self.padding_spinbox.setRange(0, 32)
+        self.padding_spinbox.setValue(self.config.get('default_padding', 2))
+        param_layout.addRow("Padding (px):", self.padding_spinbox)
+        
+        self.extrude_spinbox = QSpinBox()
+        self.extrude_spinbox.setRange(0, 16)
+        self.extrude_spinbox.setValue(self.config.get('default_extrude', 0))
+        param_layout.addRow("Extrude (px):", self.extrude_spinbox)
+        
+        self.premultiply_checkbox = QCheckBox("Premultiplied alpha")
+        self.premultiply_checkbox.setChecked(self.config.get('default_premultiply', False))
+        param_layout.addRow("Alpha:", self.premultiply_checkbox)
+        
+        # Duplicate frames share one atlas rect; threshold > 0 also merges near-duplicates
+        self.dedupe_checkbox = QCheckBox("Merge duplicate frames")
+        self.dedupe_checkbox.setChecked(self.config.get('default_dedupe', True))
+        param_layout.addRow("Dedupe:", self.dedupe_checkbox)
+        
+        self.dedupe_threshold_spinbox = QSpinBox()
+        self.dedupe_threshold_spinbox.setRange(0, 16)
+        self.dedupe_threshold_spinbox.setValue(self.config.get('default_dedupe_threshold', 0))
+        self.dedupe_threshold_spinbox.setEnabled(self.dedupe_checkbox.isChecked())
+        self.dedupe_checkbox.toggled.connect(self.dedupe_threshold_spinbox.setEnabled)
+        param_layout.addRow("Near-dup Threshold:", self.dedupe_threshold_spinbox)
+        
+        # One page set + manifest per action (or action group from config) plus an index,
+        # so the game can load only the actions a unit uses
+        self.split_output_checkbox = QCheckBox("Per-action sheets + index")
+        self.split_output_checkbox.setChecked(self.config.get('default_split_output', False))
+        param_layout.addRow("Split Output:", self.split_output_checkbox)
+        
+        # Extra KTX2 GPU texture per page (needs toktx or basisu on PATH); PNG is always written
+        self.texture_format_combo = QComboBox()
+        self.texture_format_combo.addItems(TEXTURE_FORMATS)
+        self.texture_format_combo.setCurrentText(self.config.get('default_texture_format', DEFAULT_TEXTURE_FORMAT))
+        param_layout.addRow("Texture Format:", self.texture_format_combo)
+        
+        # PNG encoder profile for atlas pages (palette is lossy, the others are lossless)
+        self.png_profile_combo = QComboBox()
+        self.png_profile_combo.addItems(PNG_PROFILES)
+        self.png_profile_combo.setCurrentText(self.config.get('default_png_profile', DEFAULT_PNG_PROFILE))
+        param_layout.addRow("PNG Profile:", self.png_profile_combo)
+        
+        # Extra downscaled atlas sets built from the same extracted frames, e.g. "1, 0.5, 0.25"
+        self.scales_edit = QLineEdit()
+        self.scales_edit.setText(', '.join(f"{scale:g}" for scale in self.config.get('default_scales', [1.0])))
+        self.scales_edit.setPlaceholderText("1, 0.5, 0.25")
+        param_layout.addRow("Scales:", self.scales_edit)
+        
+        # Stream frames from disk page by page instead of loading every frame (long 4K captures)
+        self.low_memory_checkbox = QCheckBox("Stream frames (low memory)")
+        self.low_memory_checkbox.setChecked(self.config.get('default_low_memory', False))
+        param_layout.addRow("Packing Memory:", self.low_memory_checkbox)
+        
         # Extracted frame count
         self.fps_spinbox = QSpinBox()
         self.fps_spinbox.setRange(1, 5000)
@@ -431,6 +794,24 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.fps_spinbox.setSingleStep(10)
         param_layout.addRow("Extract Count:", self.fps_spinbox)
         
+        # Video decode backend (pyav decodes multi-threaded and scales while converting)
+        self.decoder_combo = QComboBox()
+        self.decoder_combo.addItems(DECODERS)
+        self.decoder_combo.setCurrentText(self.config.get('default_decoder', DEFAULT_DECODER))
+        param_layout.addRow("Decoder:", self.decoder_combo)
+        
+        # Background removal model (session is loaded once and shared by all videos)
+        self.model_combo = QComboBox()
+        self.model_combo.addItems(REMBG_MODELS)
+        self.model_combo.setCurrentText(self.config.get('default_rembg_model', DEFAULT_REMBG_MODEL))
+        param_layout.addRow("BG Model:", self.model_combo)
+        
+        # Alpha threshold used by auto-trim (ignores faint rembg halo pixels)
+        self.alpha_threshold_spinbox = QSpinBox()
+        self.alpha_threshold_spinbox.setRange(0, 254)
+        self.alpha_threshold_spinbox.setValue(self.config.get('default_alpha_threshold', 0))
+        param_layout.addRow("Trim Alpha Threshold:", self.alpha_threshold_spinbox)
+        
         # Output directory
         output_layout = QHBoxLayout()
         self.output_edit = QLineEdit()
@@ -456,29 +837,48 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.status_text.setMaximumHeight(150)
         progress_layout.addWidget(self.status_text)
         
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        progress_layout.addWidget(self.progress_bar)
+        
         progress_group.setLayout(progress_layout)
         left_panel.addWidget(progress_group)
         
-        # Extract button
+        # Extract / cancel buttons
+        extract_layout = QHBoxLayout()
         self.start_btn = QPushButton("Extract Frames")
         self.start_btn.setMinimumHeight(50)
         self.start_btn.clicked.connect(self.start_extraction)
-        left_panel.addWidget(self.start_btn)
+        extract_layout.addWidget(self.start_btn)
+        
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setMinimumHeight(50)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_extraction)
+        extract_layout.addWidget(self.cancel_btn)
+        left_panel.addLayout(extract_layout)
         
         # Frame thumbnails
         frames_group = QGroupBox("Extracted Frames (Click to Edit)")
         frames_layout = QVBoxLayout()
         
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setMinimumHeight(200)
-        scroll_area.setMaximumHeight(300)
-        
-        self.frames_widget = QWidget()
-        self.frames_grid = QGridLayout(self.frames_widget)
-        scroll_area.setWidget(self.frames_widget)
-        
-        frames_layout.addWidget(scroll_area)
+        # Model/view grid: only visible thumbnails are decoded, on worker threads
+        self.thumbnail_pool = QThreadPool()
+        self.thumbnail_model = FrameThumbnailModel(self.make_thumbnail, self.thumbnail_pool)
+        self.frames_view = QListView()
+        self.frames_view.setViewMode(QListView.IconMode)
+        self.frames_view.setMovement(QListView.Static)
+        self.frames_view.setResizeMode(QListView.Adjust)
+        self.frames_view.setUniformItemSizes(True)
+        self.frames_view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.frames_view.setGridSize(QSize(THUMBNAIL_SIZE + 10, THUMBNAIL_SIZE + 10))
+        self.frames_view.setMinimumHeight(200)
+        self.frames_view.setMaximumHeight(300)
+        self.frames_view.setModel(self.thumbnail_model)
+        self.frames_view.clicked.connect(lambda index: self.edit_frame(index.row()))
+        
+        frames_layout.addWidget(self.frames_view)
         frames_group.setLayout(frames_layout)
         left_panel.addWidget(frames_group)
         
@@ -568,7 +968,6 @@ class VideoToSpriteSheetGUI(QMainWindow):
         
         # Frame data
         self.extracted_frames = []  # List of frame info dicts
-        self.frame_buttons = []  # List of thumbnail buttons
         self.action_buttons = []  # List of action buttons
     
     def update_animation_background(self):
@@ -617,49 +1016,10 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.add_log(f"\nPlaying action: {action_name}")
         
         try:
-            frames_dir = os.path.join(output_dir, 'frames')
-            
-            # Load JSON metadata
-            with open(json_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            
-            # Load frames for this action
-            self.animation_frames = []
-            action_prefix = f"{action_name}_"
-            
-            for frame_file in sorted(metadata['frames'].keys()):
-                if not frame_file.startswith(action_prefix):
-                    continue
-                
-                frame_path = os.path.join(frames_dir, frame_file)
-                if not os.path.exists(frame_path):
-                    self.add_log(f"Frame file not found: {frame_file}")
-                    continue
-                
-                frame_info = metadata['frames'][frame_file]
-                source_size = frame_info['sourceSize']
-                sprite_source_size = frame_info['spriteSourceSize']
-                
-                # Create canvas with original size
-                canvas = Image.new('RGBA', (source_size['w'], source_size['h']), (0, 0, 0, 0))
-                
-                # Load trimmed image
-                trimmed_img = Image.open(frame_path)
-                if trimmed_img.mode != 'RGBA':
-                    trimmed_img = trimmed_img.convert('RGBA')
-                
-                # Paste trimmed image at correct position
-                paste_pos = (sprite_source_size['x'], sprite_source_size['y'])
-                canvas.paste(trimmed_img, paste_pos, trimmed_img)
-                
-                # Convert to QPixmap for display
-                data = canvas.tobytes('raw', 'RGBA')
-                qimg = QImage(data, canvas.width, canvas.height, QImage.Format_RGBA8888)
-                pixmap = QPixmap.fromImage(qimg)
-                
-                # Scale to display area
-                pixmap = pixmap.scaledToHeight(400, Qt.SmoothTransformation)
-                self.animation_frames.append(pixmap)
+            # Atlas pages are decoded once per generation; switching back to an action hits the pixmap cache
+            if not self.atlas_preview.is_loaded(output_dir):
+                self.atlas_preview.load(output_dir)
+            self.animation_frames = self.atlas_preview.action_frames(action_name)
             
             self.add_log(f"Loaded {len(self.animation_frames)} frames for {action_name}")
             
@@ -691,65 +1051,27 @@ class VideoToSpriteSheetGUI(QMainWindow):
             self.add_log(f"Playback speed: {fps} FPS")
     
     def load_animation_frames(self, output_dir):
-        """Load generated sequence frames with trim information from JSON"""
+        """Load the generated atlas for preview and show every frame sliced from it"""
         try:
-            frames_dir = os.path.join(output_dir, 'frames')
             json_path = os.path.join(output_dir, 'spritesheet.json')
-            
-            if not os.path.exists(frames_dir):
-                self.add_log("frames directory not found")
-                return False
-            
             if not os.path.exists(json_path):
                 self.add_log("spritesheet.json not found")
                 return False
             
-            # Load JSON metadata
+            # Always reload: the atlas was (re)generated, so cached pages/frames are stale
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
+                self.atlas_preview.load(output_dir)
             except Exception as e:
                 self.add_log(f"Failed to load JSON: {e}")
                 return False
             
-            # Load all frames with trim information based on metadata
-            if not metadata.get('frames'):
+            if not self.atlas_preview.frames:
                 self.add_log("No frame metadata found")
                 return False
             
-            self.animation_frames = []
-            for frame_file in sorted(metadata['frames'].keys()):
-                frame_path = os.path.join(frames_dir, frame_file)
-                if not os.path.exists(frame_path):
-                    self.add_log(f"Frame file not found: {frame_file}")
-                    continue
-                
-                frame_info = metadata['frames'][frame_file]
-                source_size = frame_info['sourceSize']  # Original size
-                sprite_source_size = frame_info['spriteSourceSize']  # Trim info
-                
-                # Create canvas with original size
-                canvas = Image.new('RGBA', (source_size['w'], source_size['h']), (0, 0, 0, 0))
-                
-                # Load trimmed image
-                trimmed_img = Image.open(frame_path)
-                if trimmed_img.mode != 'RGBA':
-                    trimmed_img = trimmed_img.convert('RGBA')
-                
-                # Paste trimmed image at correct position
-                paste_pos = (sprite_source_size['x'], sprite_source_size['y'])
-                canvas.paste(trimmed_img, paste_pos, trimmed_img)
-                
-                # Convert to QPixmap for display
-                data = canvas.tobytes('raw', 'RGBA')
-                qimg = QImage(data, canvas.width, canvas.height, QImage.Format_RGBA8888)
-                pixmap = QPixmap.fromImage(qimg)
-                
-                # Scale to display area
-                pixmap = pixmap.scaledToHeight(400, Qt.SmoothTransformation)
-                self.animation_frames.append(pixmap)
-            
-            self.add_log(f"Loaded {len(self.animation_frames)} frames with trim information")
+            self.animation_frames = self.atlas_preview.frame_pixmaps(sorted(self.atlas_preview.frames))
+            self.add_log(f"Loaded {len(self.animation_frames)} frames from "
+                         f"{len(self.atlas_preview.page_files)} atlas page(s)")
             
             # Display first frame
             if self.animation_frames:
@@ -779,6 +1101,23 @@ class VideoToSpriteSheetGUI(QMainWindow):
             self.is_playing = True
             self.add_log(f"Playback speed: {fps} FPS")
     
+    def frame_qimage(self, frame_name, frame_path=None):
+        """Trimmed frame as a QImage sliced from the frame store without copying (falls back to the PNG)"""
+        if frame_name in self.frame_store:
+            data, width, height = self.frame_store.view(frame_name)
+            return QImage(data, width, height, width * 4, QImage.Format_RGBA8888)
+        return QImage(frame_path).convertToFormat(QImage.Format_RGBA8888)
+    
+    def trimmed_qimage(self, frame_info):
+        """The frame cropped to its current trim rect; trim edits never modify the stored pixels"""
+        image = self.frame_qimage(frame_info['name'], frame_info.get('path'))
+        source = frame_info.get('source_rect')
+        trim = frame_info['trim_info']
+        if source is None or source == trim:
+            return image
+        # Areas outside the stored pixels come out transparent
+        return image.copy(trim['x'] - source['x'], trim['y'] - source['y'], trim['w'], trim['h'])
+    
     def update_animation_frame(self):
         """Update animation frame"""
         if not self.animation_frames:
@@ -837,7 +1176,7 @@ class VideoToSpriteSheetGUI(QMainWindow):
         # Rebuild with current selections
         self.video_list.clear()
         for i, path in enumerate(self.video_paths):
-            item = QListWidgetItem(Path(path).name)
+            item = QListWidgetItem(self.video_item_text(path))
             item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
             # Keep old selections, select new items
             if i >= first_new_idx:
@@ -873,6 +1212,41 @@ class VideoToSpriteSheetGUI(QMainWindow):
         """Get only selected video paths for extraction"""
         return list(self.selected_videos)
     
+    def video_item_text(self, path):
+        """Video list label: file name plus the time range when only part is extracted"""
+        name = Path(path).name
+        if path not in self.video_ranges:
+            return name
+        start_time, end_time = self.video_ranges[path]
+        end = f"{end_time:g}s" if end_time is not None else "end"
+        return f"{name}  [{start_time:g}s - {end}]"
+    
+    def edit_video_range(self, item):
+        """Edit the time range extracted from a video"""
+        if item is None:
+            QMessageBox.information(self, "Info", "Select a video in the list first")
+            return
+        path = item.data(Qt.UserRole)
+        try:
+            duration = VideoProbe.open(path).duration
+        except ValueError:
+            QMessageBox.warning(self, "Error", f"Cannot read video: {path}")
+            return
+        
+        start_time, end_time = self.video_ranges.get(path, (0.0, None))
+        dialog = VideoRangeDialog(Path(path).name, duration, start_time, end_time, self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        
+        start_time, end_time = dialog.get_range()
+        if start_time > 0 or end_time is not None:
+            self.video_ranges[path] = (start_time, end_time)
+        else:
+            self.video_ranges.pop(path, None)
+        self.video_list.blockSignals(True)
+        item.setText(self.video_item_text(path))
+        self.video_list.blockSignals(False)
+    
     def add_log(self, message):
         """Add log message"""
         self.status_text.append(message)
@@ -885,6 +1259,7 @@ class VideoToSpriteSheetGUI(QMainWindow):
         print(f"[DEBUG] clear_videos called - extracted_frames before: {len(self.extracted_frames)} frames")
         self.video_paths = []
         self.selected_videos.clear()
+        self.video_ranges.clear()
         self.video_list.clear()
         print(f"[DEBUG] clear_videos done - extracted_frames after: {len(self.extracted_frames)} frames")
     
@@ -908,180 +1283,214 @@ class VideoToSpriteSheetGUI(QMainWindow):
         output_dir = self.output_edit.text()
         compress_ratio = self.compress_ratio_spinbox.value()
         target_count = self.fps_spinbox.value()
+        rembg_model = self.model_combo.currentText()
+        alpha_threshold = self.alpha_threshold_spinbox.value()
+        decoder = self.decoder_combo.currentText()
         
         # Clear log
         self.status_text.clear()
         self.add_log("Starting frame extraction...")
         self.add_log(f"Videos: {len(video_paths)} file(s)")
         
-        # Disable button
-        self.start_btn.setEnabled(False)
-        
-        # Extract frames only
+        # Probe all videos first so invalid files are reported before any job starts
+        converters = []
         try:
             for video_path in video_paths:
-                # Get video resolution
-                video_resolution = VideoToSpriteSheet.get_video_resolution(video_path)
-                if not video_resolution:
+                # One container open per video (memoized, extraction reuses it)
+                try:
+                    probe = VideoProbe.open(video_path)
+                except ValueError:
                     raise ValueError(f"Cannot read video: {video_path}")
-
-                total_frames = VideoToSpriteSheet.get_video_frame_count(video_path)
+                
+                total_frames = probe.frame_count
                 if not total_frames:
                     raise ValueError(f"Cannot read video frame count: {video_path}")
                 
-                original_width, original_height = video_resolution
+                # Only the selected time range is decoded, so sample within it
+                start_time, end_time = self.video_ranges.get(video_path, (0.0, None))
+                start_frame, end_frame = time_range_frames(probe.fps, start_time, end_time)
+                total_frames = max(1, min(total_frames, end_frame or total_frames) - start_frame)
+                
+                original_width, original_height = probe.resolution
                 video_size = min(original_width, original_height)
                 frame_size = int(video_size * compress_ratio)
                 action_name = Path(video_path).stem
                 
-                # Remove old frames for this action from memory
-                self.extracted_frames = [f for f in self.extracted_frames if f.get('action') != action_name]
-                
                 self.add_log(f"\nVideo: {video_path}")
                 self.add_log(f"Action: {action_name}")
-                self.add_log(f"Video resolution: {original_width}x{original_height}")
+                self.add_log(f"Video resolution: {original_width}x{original_height} "
+                             f"({probe.codec}, {probe.fps:g} fps, {probe.duration:.2f}s)")
+                if video_path in self.video_ranges:
+                    end = f"{end_time:g}s" if end_time is not None else "end"
+                    self.add_log(f"Time range: {start_time:g}s - {end} ({total_frames} frames)")
                 fps_interval = max(1, int(total_frames / max(1, target_count)))
                 self.add_log(f"Frame size: {frame_size} (compress_ratio={compress_ratio})")
                 self.add_log(f"Extract Count: {target_count} (total frames: {total_frames}, interval: {fps_interval})")
                 
-                converter = VideoToSpriteSheet(
+                converters.append(VideoToSpriteSheet(
                     video_path=video_path,
                     output_dir=output_dir,
                     frame_size=frame_size,
                     atlas_size=1024,  # Temporary, will use actual value in phase 2
                     fps_interval=fps_interval,
                     action_name=action_name,
-                    max_frames=target_count
-                )
-                
-                self.add_log("Extracting frames...")
-                frames = converter.extract_frames()
-                self.add_log(f"Extracted {len(frames)} frames for {action_name}")
-                self.extracted_frames.extend(frames)
-                # Mark this video as extracted
-                self.extracted_videos.add(video_path)
-            
-            self.add_log(f"\nTotal accumulated frames: {len(self.extracted_frames)}")
-            self.add_log(f"Total extracted videos: {len(self.extracted_videos)}")
-            
-            # Show extracted actions
-            actions = sorted({f.get('action') for f in self.extracted_frames if f.get('action')})
-            self.add_log(f"Extracted actions: {', '.join(actions) if actions else 'None'}")
-            
-            self.add_log("Frame extraction completed!")
-            
-            # Display thumbnails
-            self.display_frame_thumbnails()
-            
-            # Build action buttons
-            self.build_action_buttons()
-            
-            # Enable generate button
-            self.generate_btn.setEnabled(True)
-            self.start_btn.setEnabled(True)
-            
-            QMessageBox.information(self, "Success", "Frame extraction completed!\nYou can now click frames to edit trim areas.")
-            
+                    max_frames=target_count,
+                    rembg_model=rembg_model,
+                    alpha_threshold=alpha_threshold,
+                    use_cache=self.config.get('use_extraction_cache', True),
+                    decoder=decoder,
+                    start_time=start_time,
+                    end_time=end_time
+                ))
         except Exception as e:
             self.add_log(f"Error: {str(e)}")
-            self.start_btn.setEnabled(True)
             QMessageBox.critical(self, "Error", f"Frame extraction failed:\n{str(e)}")
+            return
+        
+        # Disable button
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        
+        # Queue one job per video; the pool runs several of them at once
+        self.extraction_cancel.clear()
+        self.extraction_jobs = {}
+        self.extraction_progress = {}
+        self.extraction_failures = []
+        self.progress_bar.setValue(0)
+        self.add_log(f"\nExtracting frames ({self.extraction_pool.maxThreadCount()} videos in parallel)...")
+        
+        for converter in converters:
+            job = ExtractionJob(converter, self.extraction_cancel, self.frame_store)
+            job.signals.progress.connect(self.on_extraction_progress)
+            job.signals.finished.connect(self.on_extraction_finished)
+            job.signals.failed.connect(self.on_extraction_failed)
+            job.signals.cancelled.connect(self.on_extraction_cancelled)
+            self.extraction_jobs[converter.video_path] = job
+            self.extraction_progress[converter.video_path] = (0, converter.max_frames or 1)
+            self.extraction_pool.start(job)
     
-    def display_frame_thumbnails(self):
-        """Display frame thumbnails in grid"""
-        # Clear existing thumbnails
-        for btn in self.frame_buttons:
-            btn.deleteLater()
-        self.frame_buttons.clear()
+    def cancel_extraction(self):
+        """Request cancellation of all running and queued extraction jobs"""
+        if self.extraction_jobs:
+            self.extraction_cancel.set()
+            self.cancel_btn.setEnabled(False)
+            self.add_log("Cancelling extraction...")
+    
+    def on_extraction_progress(self, video_path, done, total):
+        """Per-frame progress from one job -> overall progress bar"""
+        self.extraction_progress[video_path] = (done, total)
+        done_sum = sum(d for d, _ in self.extraction_progress.values())
+        total_sum = sum(t for _, t in self.extraction_progress.values())
+        self.progress_bar.setValue(int(done_sum * 100 / max(1, total_sum)))
+    
+    def on_extraction_finished(self, video_path, frames):
+        """One video finished: merge its frames and refresh the UI immediately"""
+        action_name = Path(video_path).stem
         
-        # Create thumbnails
-        for idx, frame_info in enumerate(self.extracted_frames):
-            frame_path = frame_info['path']
-            
-            # Load thumbnail
-            img = Image.open(frame_path)
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-            
-            # Create thumbnail (80x80)
-            img.thumbnail((80, 80))
-            
-            # Convert to QPixmap
-            data = img.tobytes('raw', 'RGBA')
-            qimg = QImage(data, img.width, img.height, QImage.Format_RGBA8888)
-            pixmap = QPixmap.fromImage(qimg)
-            
-            # Create button
-            btn = QPushButton()
-            btn.setIcon(QIcon(pixmap))
-            btn.setIconSize(pixmap.size())
-            btn.setFixedSize(90, 90)
-            frame_name = frame_info.get('name', f"Frame {idx}")
-            btn.setToolTip(frame_name)
-            btn.clicked.connect(lambda checked, i=idx: self.edit_frame(i))
-            
-            # Add to grid
-            row = idx // 4
-            col = idx % 4
-            self.frames_grid.addWidget(btn, row, col)
-            self.frame_buttons.append(btn)
+        # Replace old frames for this action
+        self.extracted_frames = [f for f in self.extracted_frames if f.get('action') != action_name]
+        self.extracted_frames.extend(frames)
+        self.extracted_videos.add(video_path)
+        
+        self.on_extraction_progress(video_path, len(frames), len(frames))
+        self.add_log(f"Extracted {len(frames)} frames for {action_name}")
+        
+        # Display thumbnails and action buttons as each video finishes
+        self.display_frame_thumbnails()
+        self.build_action_buttons()
+        self.generate_btn.setEnabled(True)
+        
+        self.finish_extraction_job(video_path)
+    
+    def on_extraction_failed(self, video_path, message):
+        """One video failed"""
+        self.add_log(f"Error ({Path(video_path).name}): {message}")
+        self.extraction_failures.append((video_path, message))
+        self.finish_extraction_job(video_path)
+    
+    def on_extraction_cancelled(self, video_path):
+        """One video was cancelled"""
+        self.add_log(f"Cancelled: {Path(video_path).name}")
+        self.finish_extraction_job(video_path)
+    
+    def finish_extraction_job(self, video_path):
+        """Bookkeeping after any job ends; summarize once all jobs are done"""
+        self.extraction_jobs.pop(video_path, None)
+        if self.extraction_jobs:
+            return
+        
+        self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        
+        self.add_log(f"\nTotal accumulated frames: {len(self.extracted_frames)}")
+        self.add_log(f"Total extracted videos: {len(self.extracted_videos)}")
+        
+        # Show extracted actions
+        actions = sorted({f.get('action') for f in self.extracted_frames if f.get('action')})
+        self.add_log(f"Extracted actions: {', '.join(actions) if actions else 'None'}")
+        
+        if self.extraction_cancel.is_set():
+            self.add_log("Frame extraction cancelled")
+        elif self.extraction_failures:
+            failed_path, message = self.extraction_failures[0]
+            self.add_log("Frame extraction finished with errors")
+            QMessageBox.critical(
+                self, "Error",
+                f"Frame extraction failed for {len(self.extraction_failures)} video(s):\n{failed_path}\n{message}"
+            )
+        else:
+            self.progress_bar.setValue(100)
+            self.add_log("Frame extraction completed!")
+            QMessageBox.information(self, "Success", "Frame extraction completed!\nYou can now click frames to edit trim areas.")
+    
+    def display_frame_thumbnails(self):
+        """Show the extracted frames in the thumbnail grid (thumbnails decode lazily when scrolled into view)"""
+        self.thumbnail_model.set_frames(self.extracted_frames)
+    
+    def make_thumbnail(self, frame_info):
+        """Thumbnail of a frame's current trim (fits THUMBNAIL_SIZE, never upscaled); safe to call off the UI thread"""
+        image = self.trimmed_qimage(frame_info)
+        if image.isNull():
+            image = QImage(1, 1, QImage.Format_RGBA8888)
+            image.fill(Qt.transparent)
+        if image.width() > THUMBNAIL_SIZE or image.height() > THUMBNAIL_SIZE:
+            return image.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # Detach from the frame store memory before handing the image to the UI thread
+        return image.copy()
     
     def edit_frame(self, frame_index):
         """Edit frame trim area"""
         frame_info = self.extracted_frames[frame_index]
         
         dialog = FrameEditorDialog(
-            frame_info['path'],
+            self.frame_qimage(frame_info['name'], frame_info['path']),
+            frame_info['name'],
             frame_info['trim_info'],
             frame_info['original_size'],
+            frame_info.get('source_rect'),
             self
         )
         
         if dialog.exec_() == QDialog.Accepted:
-            # Update trim info
+            # Trim edits are metadata only: the stored frame pixels stay untouched and
+            # sprite sheet generation crops them to the new rect (so a trim can be widened again)
             new_trim_info = dialog.get_trim_info()
-            old_trim = self.extracted_frames[frame_index]['trim_info']
-            
-            # Calculate the adjustment: new trim relative to old trim
-            # The frame image file contains the OLD trimmed area
-            # We need to adjust coordinates
-            self.extracted_frames[frame_index]['trim_info'] = new_trim_info
-            
-            # Recalculate trim relative to the original frame stored in the file
-            self.recrop_frame(frame_index, old_trim, new_trim_info)
+            old_trim = frame_info['trim_info']
+            frame_info.setdefault('source_rect', dict(old_trim))
+            frame_info['trim_info'] = new_trim_info
             
-            # Update thumbnail
-            self.display_frame_thumbnails()
+            # Re-decode only this frame's thumbnail
+            self.thumbnail_model.refresh_frame(frame_index)
             
-            self.add_log(f"Frame {frame_index} trim updated: {new_trim_info}")
+            self.add_log(f"Frame {frame_index} trim updated: {old_trim} -> {new_trim_info}")
     
-    def recrop_frame(self, frame_index, old_trim, new_trim):
-        """Re-crop frame based on updated trim info"""
-        frame_info = self.extracted_frames[frame_index]
-        frame_path = frame_info['path']
-        original_size = frame_info['original_size']
-        
-        # Load the currently saved trimmed image
-        trimmed_img = Image.open(frame_path)
-        if trimmed_img.mode != 'RGBA':
-            trimmed_img = trimmed_img.convert('RGBA')
-        
-        # Reconstruct the full original frame by placing trimmed image at old position
-        full_frame = Image.new('RGBA', (original_size, original_size), (0, 0, 0, 0))
-        full_frame.paste(trimmed_img, (old_trim['x'], old_trim['y']), trimmed_img)
-        
-        # Now crop the new trim area from the full frame
-        new_cropped = full_frame.crop((
-            new_trim['x'],
-            new_trim['y'],
-            new_trim['x'] + new_trim['w'],
-            new_trim['y'] + new_trim['h']
-        ))
-        
-        # Save the new cropped image
-        new_cropped.save(frame_path)
-        
-        self.add_log(f"Re-cropped frame {frame_index}: from {old_trim} to {new_trim}")
+    def get_scales(self):
+        """Parse the comma separated scale list (1x is always generated)"""
+        text = self.scales_edit.text().replace(',', ' ')
+        try:
+            return [float(part) for part in text.split()]
+        except ValueError:
+            raise ValueError(f"Invalid scales: {self.scales_edit.text()}")
     
     def generate_spritesheet(self):
         """Generate sprite sheet (Phase 2)"""
@@ -1104,36 +1513,6 @@ class VideoToSpriteSheetGUI(QMainWindow):
         self.generate_btn.setEnabled(False)
         
         try:
-            # Clear old JSON and PNG files before generation
-            json_files = [
-                os.path.join(output_dir, 'spritesheet.json'),
-                os.path.join(output_dir, 'spritesheet_001.json'),
-                os.path.join(output_dir, 'spritesheet_002.json'),
-                os.path.join(output_dir, 'spritesheet_003.json'),
-            ]
-            png_files = [
-                os.path.join(output_dir, 'spritesheet_000.png'),
-                os.path.join(output_dir, 'spritesheet_001.png'),
-                os.path.join(output_dir, 'spritesheet_002.png'),
-                os.path.join(output_dir, 'spritesheet_003.png'),
-            ]
-            
-            for json_file in json_files:
-                if os.path.exists(json_file):
-                    try:
-                        os.remove(json_file)
-                        self.add_log(f"Cleared old metadata: {os.path.basename(json_file)}")
-                    except Exception as e:
-                        self.add_log(f"Warning: Could not delete {json_file}: {e}")
-            
-            for png_file in png_files:
-                if os.path.exists(png_file):
-                    try:
-                        os.remove(png_file)
-                        self.add_log(f"Cleared old sprite sheet: {os.path.basename(png_file)}")
-                    except Exception as e:
-                        self.add_log(f"Warning: Could not delete {png_file}: {e}")
-            
             video_paths = self.get_video_paths()
             reference_video = video_paths[0] if video_paths else ""
             # Create converter (reuse config)
@@ -1142,7 +1521,22 @@ class VideoToSpriteSheetGUI(QMainWindow):
                 output_dir=output_dir,
                 frame_size=self.extracted_frames[0]['original_size'],
                 atlas_size=atlas_size,
-                fps_interval=1  # Not used in this phase
+                fps_interval=1,  # Not used in this phase
+                packer=self.packer_combo.currentText(),
+                allow_rotation=self.allow_rotation_checkbox.isChecked(),
+                dedupe=self.dedupe_checkbox.isChecked(),
+                dedupe_threshold=self.dedupe_threshold_spinbox.value(),
+                # Only actions whose frames changed are re-packed; stale sheets are removed
+                incremental=self.config.get('incremental_build', False),
+                split_output=self.split_output_checkbox.isChecked(),
+                action_groups=self.config.get('action_groups', {}),
+                texture_format=self.texture_format_combo.currentText(),
+                png_profile=self.png_profile_combo.currentText(),
+                padding=self.padding_spinbox.value(),
+                extrude=self.extrude_spinbox.value(),
+                premultiply=self.premultiply_checkbox.isChecked(),
+                scales=self.get_scales(),
+                low_memory=self.low_memory_checkbox.isChecked()
             )
             
             # Create sprite sheets with updated frame info
@@ -1151,10 +1545,8 @@ class VideoToSpriteSheetGUI(QMainWindow):
             self.add_log(f"\nActions to be packaged: {', '.join(actions) if actions else 'None'}")
             self.add_log(f"Total frames to package: {len(self.extracted_frames)}")
             
-            sheets_info = converter.create_sprite_sheets(self.extracted_frames)
-            
-            # Generate metadata
-            converter.generate_metadata(sheets_info, len(self.extracted_frames))
+            # Pack sheets and write metadata for every scale variant
+            converter.build_atlases(self.extracted_frames)
             
             self.add_log("Sprite sheet generation completed!")
             
@@ -3,13 +3,113 @@
 将视频按指定时间间隔提取帧，合并成Sprite Sheet，并生成JSON元数据
 """
 
-import cv2
 import os
 import json
+import time
+import shutil
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from PIL import Image
+import re
 import math
+import numpy as np
 from pathlib import Path
-from rembg import remove
+
+from bg_removal import BatchBackgroundRemover, REMBG_MODELS, DEFAULT_REMBG_MODEL
+from extract_cache import ExtractionCache, CACHE_DIR_NAME, DEFAULT_CACHE_MAX_BYTES
+from packers import create_packer, PACKERS, DEFAULT_PACKER
+from dedupe import find_duplicates
+from video_probe import VideoProbe
+from decoders import create_decoder, time_range_frames, DECODERS, DEFAULT_DECODER
+from texture_export import (
+    TEXTURE_FORMATS, DEFAULT_TEXTURE_FORMAT, PNG_FORMAT_NAME, KTX2_FORMAT_NAMES, find_encoder, export_ktx2,
+    PNG_PROFILES, DEFAULT_PNG_PROFILE, save_png, premultiply_alpha
+)
+
+
+# 流水线各阶段名称（按处理顺序）
+PIPELINE_STAGES = ('decode', 'rembg', 'trim', 'save')
+
+# 输出文件名前缀：1x为 spritesheet.json / spritesheet_000.png ...，
+# 其他缩放比例为 spritesheet@0.5x.json / spritesheet@0.5x_000.png ...
+OUTPUT_PREFIX = 'spritesheet'
+_VARIANT_FILE_PATTERN = re.compile(r'^\.?(spritesheet@[0-9.]+x)[._]')
+
+# 增量构建状态文件格式版本（状态文件为输出目录下的 .<前缀>_state.json）
+BUILD_STATE_VERSION = 2
+
+
+def write_json_atomic(path: str, data, **kwargs):
+    """先写临时文件再原子替换，读取方不会看到写了一半的JSON"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, **kwargs)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _init_pipeline_worker(onnx_threads: int):
+    """流水线子进程初始化：限制每个进程的ONNX线程数，避免多进程间抢占CPU"""
+    os.environ['OMP_NUM_THREADS'] = str(onnx_threads)
+
+
+def _process_frame_batch(task: dict) -> tuple:
+    """
+    流水线工作函数（可在子进程中运行）：去背景 → 裁剪 → 保存PNG
+    
+    Args:
+        task: {'model': 模型名, 'batch_size': 批大小, 'alpha_threshold': 裁剪alpha阈值,
+               'frames': [(帧路径, RGB数组), ...], 'return_images': 写了PNG后是否仍返回源图}；
+              帧路径为None时不写PNG，直接返回源图
+    返回: ([(trim_info, source_rect, 源图或None), ...], 各阶段耗时{'rembg','trim','save'})
+          源图保存alpha>0的全部像素（位于原帧source_rect处），alpha阈值只决定初始的trim_info，
+          之后放宽裁剪区域时被阈值去掉的光晕像素仍可恢复
+    """
+    timings = {'rembg': 0.0, 'trim': 0.0, 'save': 0.0}
+    
+    # 每个进程内模型只加载一次（get_session按进程缓存）
+    start = time.perf_counter()
+    remover = BatchBackgroundRemover(task['model'], task['batch_size'])
+    images = [Image.fromarray(rgb) for _, rgb in task['frames']]
+    images_no_bg = remover.remove_batch(images)
+    timings['rembg'] += time.perf_counter() - start
+    
+    results = []
+    for (frame_path, _), image_no_bg in zip(task['frames'], images_no_bg):
+        # 自动裁剪透明边界：源图只去掉完全透明的边，阈值裁剪在源图上计算
+        start = time.perf_counter()
+        source_image, source_rect = VideoToSpriteSheet.trim_image(image_no_bg)
+        trim_info = source_rect
+        if task['alpha_threshold'] > 0 and source_rect['w'] > 0:
+            _, inner = VideoToSpriteSheet.trim_image(source_image, task['alpha_threshold'])
+            if inner['w'] > 0:
+                inner['x'] += source_rect['x']
+                inner['y'] += source_rect['y']
+            trim_info = inner
+        timings['trim'] += time.perf_counter() - start
+        
+        if frame_path is None:
+            results.append((trim_info, source_rect, source_image))
+            continue
+        
+        # 保存源图
+        start = time.perf_counter()
+        source_image.save(frame_path)
+        timings['save'] += time.perf_counter() - start
+        
+        results.append((trim_info, source_rect, source_image if task.get('return_images') else None))
+    
+    return results, timings
+
+
+class ExtractionCancelled(Exception):
+    """帧提取被用户取消"""
 
 
 class VideoToSpriteSheet:
@@ -20,7 +120,31 @@ class VideoToSpriteSheet:
                  atlas_size: int = 1024,
                  fps_interval: int = 30,
                  action_name: str = None,
-                 max_frames: int = None):
+                 max_frames: int = None,
+                 rembg_model: str = DEFAULT_REMBG_MODEL,
+                 bg_batch_size: int = 4,
+                 workers: int = 0,
+                 alpha_threshold: int = 0,
+                 use_cache: bool = True,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 packer: str = DEFAULT_PACKER,
+                 allow_rotation: bool = False,
+                 dedupe: bool = True,
+                 dedupe_threshold: int = 0,
+                 incremental: bool = False,
+                 split_output: bool = False,
+                 action_groups: dict = None,
+                 texture_format: str = DEFAULT_TEXTURE_FORMAT,
+                 png_profile: str = DEFAULT_PNG_PROFILE,
+                 padding: int = 2,
+                 extrude: int = 0,
+                 premultiply: bool = False,
+                 scales: list = None,
+                 low_memory: bool = False,
+                 keep_frames: bool = True,
+                 decoder: str = DEFAULT_DECODER,
+                 start_time: float = 0.0,
+                 end_time: float = None):
         """
         初始化转换器
         
@@ -30,7 +154,36 @@ class VideoToSpriteSheet:
             frame_size: 单个帧的大小（像素，正方形）
             atlas_size: Sprite Sheet的大小（像素，正方形）
             fps_interval: 帧间隔（每多少帧取一张，30fps视频的30表示1秒取1张）
+            rembg_model: 背景移除模型（u2net / u2netp / isnet-general-use / silueta）
+            bg_batch_size: 去背景时每次推理的帧数
+            workers: 流水线工作进程数（0表示在当前进程内串行处理）
+            alpha_threshold: 自动裁剪时alpha大于该值的像素才算作内容（0-254）
+            use_cache: 是否使用提取缓存（输出目录下的.cache，视频和参数不变时直接复用结果）
+            cache_max_bytes: 提取缓存的大小上限（字节），超出后按LRU淘汰
+            packer: Sprite Sheet装箱算法（maxrects-bssf / maxrects-blsf / maxrects-baf / skyline / shelf）
+            allow_rotation: 装箱时是否允许把帧旋转90°（元数据中rotated=true，需要客户端支持）
+            dedupe: 是否合并重复帧（图集中只存一份，多个帧名指向同一个frame矩形）
+            dedupe_threshold: 近似重复的感知哈希汉明距离阈值（0表示只合并像素完全相同的帧）
+            incremental: 增量构建（每个动作单独成页，只重新装箱内容变化了的动作）
+            split_output: 分组输出（每个动作/分组单独成页并有自己的清单JSON，另写动作索引，客户端可按需加载）
+            action_groups: 动作分组 {分组名: [动作名, ...]}，同组动作装进同一组Sheet；未列出的动作各自一组
+            texture_format: 额外导出的GPU压缩纹理（png / etc1s / uastc / astc），非png时与PNG并存输出KTX2
+            png_profile: Sheet PNG编码配置（default / lossless / clean-alpha / palette）
+            padding: Sheet中相邻帧（含外扩像素）之间的透明间距（像素）
+            extrude: 每帧四周重复边缘像素的宽度（像素），线性过滤/mipmap采样时不会混入相邻帧
+            premultiply: 输出预乘alpha的Sheet（meta.premultipliedAlpha=true）
+            scales: 输出的缩放比例列表（如 [1, 0.5, 0.25]），每个比例一套Sheet和元数据，1x总会输出
+            low_memory: 流式装箱：只按帧尺寸计算装箱，逐页从磁盘读入帧合成并立即保存，
+                        内存峰值约为一页加一帧（适合长时间高分辨率素材）
+            keep_frames: 把裁剪后的帧保存为 frames/*.png；为False时帧只保存在内存中（frame_info['image']），
+                         直接交给装箱，省去每帧一次PNG编码和解码
+            decoder: 视频解码后端 opencv / pyav（多线程解码，解码时直接缩放到帧大小）
+            start_time: 只提取该时间（秒）之后的帧，解码时直接定位过去
+            end_time: 提取到该时间（秒，不含）为止，None表示到视频结尾
         """
+        if rembg_model not in REMBG_MODELS:
+            raise ValueError(f"不支持的rembg模型: {rembg_model}（可选: {', '.join(REMBG_MODELS)}）")
+        
         self.video_path = video_path
         self.output_dir = output_dir
         self.frame_size = frame_size
@@ -38,6 +191,45 @@ class VideoToSpriteSheet:
         self.fps_interval = fps_interval
         self.action_name = action_name or Path(video_path).stem
         self.max_frames = max_frames
+        self.rembg_model = rembg_model
+        self.bg_batch_size = max(1, bg_batch_size)
+        self.workers = max(0, workers)
+        self.alpha_threshold = min(max(0, alpha_threshold), 254)
+        self.use_cache = use_cache
+        self.cache_max_bytes = cache_max_bytes
+        if packer not in PACKERS:
+            raise ValueError(f"不支持的装箱算法: {packer}（可选: {', '.join(PACKERS)}）")
+        self.packer = packer
+        self.allow_rotation = allow_rotation
+        self.dedupe = dedupe
+        self.dedupe_threshold = max(0, dedupe_threshold)
+        self.incremental = incremental
+        self.split_output = split_output
+        self.action_groups = action_groups or {}
+        if texture_format not in TEXTURE_FORMATS:
+            raise ValueError(f"不支持的纹理格式: {texture_format}（可选: {', '.join(TEXTURE_FORMATS)}）")
+        self.texture_format = texture_format
+        if png_profile not in PNG_PROFILES:
+            raise ValueError(f"不支持的PNG编码配置: {png_profile}（可选: {', '.join(PNG_PROFILES)}）")
+        self.png_profile = png_profile
+        self.padding = max(0, padding)
+        self.extrude = max(0, extrude)
+        self.premultiply = premultiply
+        invalid = [scale for scale in (scales or []) if not 0 < scale <= 1]
+        if invalid:
+            raise ValueError(f"缩放比例必须在 (0, 1] 之间: {invalid}")
+        self.scales = sorted({1.0, *(float(scale) for scale in scales or [])}, reverse=True)
+        # 当前正在生成的缩放比例（决定输出文件名和meta.scale）
+        self.scale = 1.0
+        self.low_memory = low_memory
+        self.keep_frames = keep_frames
+        if decoder not in DECODERS:
+            raise ValueError(f"不支持的解码器: {decoder}（可选: {', '.join(DECODERS)}）")
+        self.decoder = decoder
+        if start_time < 0 or (end_time is not None and end_time <= start_time):
+            raise ValueError(f"无效的时间范围: {start_time} - {end_time}")
+        self.start_time = float(start_time)
+        self.end_time = None if end_time is None else float(end_time)
         
         # 计算一张Sprite Sheet中能容纳的帧数
         self.frames_per_row = atlas_size // frame_size
@@ -52,10 +244,43 @@ class VideoToSpriteSheet:
         print(f"  视频: {video_path}")
         print(f"  单帧大小: {frame_size}x{frame_size}")
         print(f"  Atlas大小: {atlas_size}x{atlas_size}")
+        print(f"  装箱算法: {packer}{' (允许旋转)' if allow_rotation else ''}")
         print(f"  一行帧数: {self.frames_per_row}")
         print(f"  每张Sheet帧数: {self.frames_per_sheet}")
         print(f"  帧间隔: {fps_interval}帧")
         print(f"  动作名: {self.action_name}")
+        if self.has_time_range():
+            print(f"  时间范围: {self.format_time_range()}")
+        print(f"  解码器: {self.decoder}")
+        print(f"  去背景模型: {self.rembg_model} (批大小: {self.bg_batch_size})")
+        if self.workers:
+            print(f"  流水线进程数: {self.workers}")
+        if self.alpha_threshold:
+            print(f"  裁剪alpha阈值: {self.alpha_threshold}")
+        if not self.dedupe:
+            print("  重复帧合并: 关闭")
+        elif self.dedupe_threshold:
+            print(f"  近似重复阈值: {self.dedupe_threshold}")
+        if self.incremental:
+            print("  增量构建: 开启")
+        if self.split_output:
+            print("  分组输出: 开启")
+        for group, actions in self.action_groups.items():
+            print(f"  动作分组 {group}: {', '.join(actions)}")
+        if self.texture_format != 'png':
+            print(f"  压缩纹理: {KTX2_FORMAT_NAMES[self.texture_format]}")
+        if self.png_profile != DEFAULT_PNG_PROFILE:
+            print(f"  PNG编码: {self.png_profile}")
+        if len(self.scales) > 1:
+            print(f"  缩放版本: {', '.join(f'{scale:g}x' for scale in self.scales)}")
+        if not self.keep_frames:
+            print("  中间帧: 仅内存（不写frames/*.png）")
+        if self.low_memory:
+            print("  低内存流式装箱: 开启")
+        print(f"  帧间距: {self.padding}px, 边缘外扩: {self.extrude}px"
+              + ("，预乘alpha" if self.premultiply else ""))
+        if not self.use_cache:
+            print("  提取缓存: 关闭")
         if self.max_frames:
             print(f"  最大帧数: {self.max_frames}")
         print()
@@ -67,87 +292,61 @@ class VideoToSpriteSheet:
     @staticmethod
     def get_video_resolution(video_path: str) -> tuple:
         """
-        获取视频的原始分辨率
+        获取视频的原始分辨率（VideoProbe的包装，同一文件只打开一次）
         返回: (width, height) 或 None如果无法打开视频
         """
         try:
-            vidcap = cv2.VideoCapture(video_path)
-            if not vidcap.isOpened():
-                return None
-            
-            width = int(vidcap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(vidcap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            vidcap.release()
-            
-            return (width, height)
-        except:
+            return VideoProbe.open(video_path).resolution
+        except ValueError:
             return None
 
     @staticmethod
     def get_video_fps(video_path: str) -> float:
         """
-        获取视频FPS
+        获取视频FPS（VideoProbe的包装）
         返回: fps 或 None如果无法打开视频
         """
         try:
-            vidcap = cv2.VideoCapture(video_path)
-            if not vidcap.isOpened():
-                return None
-            fps = float(vidcap.get(cv2.CAP_PROP_FPS))
-            vidcap.release()
-            return fps if fps > 0 else None
-        except:
+            fps = VideoProbe.open(video_path).fps
+        except ValueError:
             return None
+        return fps if fps > 0 else None
 
     @staticmethod
     def get_video_frame_count(video_path: str) -> int:
         """
-        获取视频总帧数
+        获取视频总帧数（VideoProbe的包装）
         返回: total_frames 或 None如果无法打开视频
         """
         try:
-            vidcap = cv2.VideoCapture(video_path)
-            if not vidcap.isOpened():
-                return None
-            total_frames = int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT))
-            vidcap.release()
-            return total_frames if total_frames > 0 else None
-        except:
+            total_frames = VideoProbe.open(video_path).frame_count
+        except ValueError:
             return None
+        return total_frames if total_frames > 0 else None
 
-    def trim_image(self, image):
+    @staticmethod
+    def trim_image(image, alpha_threshold: int = 0):
         """
         裁剪图片的透明边界
+        alpha_threshold: alpha大于该值的像素才算作内容（用于忽略rembg留下的半透明光晕）
         返回: (裁剪后的图片, 裁剪信息{'x': int, 'y': int, 'w': int, 'h': int})
         """
         # 获取图片的alpha通道
         if image.mode != 'RGBA':
             image = image.convert('RGBA')
         
-        # 获取图片数据
-        data = image.getdata()
-        width, height = image.size
-        
-        # 找到非透明的边界
-        left = width
-        right = 0
-        top = height
-        bottom = 0
-        
-        for y in range(height):
-            for x in range(width):
-                # 检查该像素的alpha值
-                if data[y * width + x][3] > 0:  # alpha > 0
-                    left = min(left, x)
-                    right = max(right, x)
-                    top = min(top, y)
-                    bottom = max(bottom, y)
+        # 按行/列投影找到非透明的边界
+        opaque = np.asarray(image.getchannel('A')) > alpha_threshold
+        rows = np.flatnonzero(opaque.any(axis=1))
+        cols = np.flatnonzero(opaque.any(axis=0))
         
         # 如果图片完全透明
-        if left >= right or top >= bottom:
+        if rows.size == 0:
             return image.crop((0, 0, 0, 0)), {'x': 0, 'y': 0, 'w': 0, 'h': 0}
         
         # 裁剪图片
+        left, right = int(cols[0]), int(cols[-1])
+        top, bottom = int(rows[0]), int(rows[-1])
         trim_box = (left, top, right + 1, bottom + 1)
         trimmed = image.crop(trim_box)
         
@@ -159,9 +358,172 @@ class VideoToSpriteSheet:
         }
         
         return trimmed, trim_info
-    
-    def extract_frames(self) -> list:
-        """提取视频帧、去除背景并自动裁剪"""
+
+    @staticmethod
+    def scale_trimmed_image(image, trim_info: dict, scale: float) -> tuple:
+        """
+        把全分辨率的裁剪结果缩小到scale倍，不重新去背景和裁剪
+        缩小后的区域向外取整到整像素，并按原图坐标精确采样，保证与1x版本对齐
+        返回: (缩小后的图片, 缩小后的裁剪信息)
+        """
+        x, y, w, h = trim_info['x'], trim_info['y'], trim_info['w'], trim_info['h']
+        scaled_trim = VideoToSpriteSheet.scale_trim_info(trim_info, scale)
+        if w == 0 or h == 0:
+            return image, scaled_trim
+        
+        x0, y0 = scaled_trim['x'], scaled_trim['y']
+        x1, y1 = x0 + scaled_trim['w'], y0 + scaled_trim['h']
+        
+        # 缩小后区域在原图中对应的范围（相对裁剪图），超出裁剪图的部分补透明
+        left, top = x0 / scale - x, y0 / scale - y
+        right, bottom = x1 / scale - x, y1 / scale - y
+        pad_left, pad_top = math.ceil(-left), math.ceil(-top)
+        pad_right, pad_bottom = math.ceil(right - w), math.ceil(bottom - h)
+        canvas = Image.new('RGBA', (w + pad_left + pad_right, h + pad_top + pad_bottom), (0, 0, 0, 0))
+        canvas.paste(image, (pad_left, pad_top))
+        
+        scaled = canvas.resize(
+            (x1 - x0, y1 - y0), Image.Resampling.LANCZOS,
+            box=(left + pad_left, top + pad_top, right + pad_left, bottom + pad_top)
+        )
+        return scaled, scaled_trim
+
+    @staticmethod
+    def scale_trim_info(trim_info: dict, scale: float) -> dict:
+        """裁剪区域缩小到scale倍后的位置和大小（向外取整到整像素）"""
+        x, y, w, h = trim_info['x'], trim_info['y'], trim_info['w'], trim_info['h']
+        if w == 0 or h == 0:
+            return dict(trim_info)
+        x0, y0 = math.floor(x * scale), math.floor(y * scale)
+        x1, y1 = math.ceil((x + w) * scale), math.ceil((y + h) * scale)
+        return {'x': x0, 'y': y0, 'w': x1 - x0, 'h': y1 - y0}
+
+    def scale_frame(self, frame_info: dict, scale: float) -> dict:
+        """
+        生成某个缩放比例下的帧信息
+        缩小后的图片在装箱时才由 load_frame_image 从全分辨率帧生成；'path'仍指向全分辨率帧，用于增量构建的内容哈希
+        """
+        return dict(
+            frame_info,
+            trim_info=self.scale_trim_info(frame_info['trim_info'], scale),
+            # 与裁剪区域同样向上取整，保证缩小后的裁剪区域不超出原帧大小
+            original_size=math.ceil(frame_info['original_size'] * scale),
+            scale=scale,
+            source_trim_info=frame_info['trim_info']
+        )
+
+    @staticmethod
+    def apply_trim(image, source_rect: dict, trim_info: dict):
+        """
+        从源图（位于原帧 source_rect 处）中取出 trim_info 区域，超出源图的部分为透明
+        裁剪区域的修改只改trim_info，源图保持不变，这里在装箱时才按当前区域裁出像素
+        """
+        if source_rect == trim_info:
+            return image
+        left, top = trim_info['x'] - source_rect['x'], trim_info['y'] - source_rect['y']
+        return image.crop((left, top, left + trim_info['w'], top + trim_info['h']))
+
+    @classmethod
+    def load_frame_image(cls, frame_info: dict):
+        """
+        读取一帧裁剪后的RGBA图片（内存中的帧直接使用）
+        修改过裁剪区域的帧在这里从源图按当前区域裁出；缩放版本的帧再从全分辨率结果缩小得到
+        """
+        if 'image' in frame_info:
+            image = frame_info['image']
+        else:
+            image = Image.open(frame_info['path']).convert('RGBA')
+        if 'source_rect' in frame_info:
+            image = cls.apply_trim(image, frame_info['source_rect'],
+                                   frame_info.get('source_trim_info', frame_info['trim_info']))
+        if frame_info.get('scale', 1) != 1:
+            image, _ = cls.scale_trimmed_image(image, frame_info['source_trim_info'], frame_info['scale'])
+        return image
+
+    @staticmethod
+    def frame_image_size(frame_info: dict) -> tuple:
+        """一帧裁剪后图片的大小，不解码像素（缩放版本和带源图区域的帧由裁剪信息得到，否则只读PNG文件头）"""
+        if frame_info.get('scale', 1) != 1 or 'source_rect' in frame_info:
+            return frame_info['trim_info']['w'], frame_info['trim_info']['h']
+        if 'image' in frame_info:
+            return frame_info['image'].size
+        with Image.open(frame_info['path']) as image:
+            return image.size
+
+    @staticmethod
+    def variant_prefix(scale: float) -> str:
+        """某个缩放比例的输出文件名前缀"""
+        return OUTPUT_PREFIX if scale == 1 else f"{OUTPUT_PREFIX}@{scale:g}x"
+
+    @property
+    def file_prefix(self) -> str:
+        """当前缩放比例的输出文件名前缀"""
+        return self.variant_prefix(self.scale)
+
+    @staticmethod
+    def extrude_image(image, amount: int):
+        """四周各重复 amount 像素的边缘像素（防止线性过滤/mipmap时采样到相邻帧或透明间隙）"""
+        if amount <= 0 or image.width == 0 or image.height == 0:
+            return image
+        data = np.pad(np.asarray(image), ((amount, amount), (amount, amount), (0, 0)), mode='edge')
+        return Image.fromarray(data)
+
+    def has_time_range(self) -> bool:
+        """是否只提取视频的一段"""
+        return self.start_time > 0 or self.end_time is not None
+
+    def format_time_range(self) -> str:
+        """时间范围的显示文本"""
+        end = '结尾' if self.end_time is None else f"{self.end_time:g}s"
+        return f"{self.start_time:g}s - {end}"
+
+    def cache_params(self) -> dict:
+        """影响提取结果的参数（组成缓存键的一部分）"""
+        return {
+            'frame_size': self.frame_size,
+            'fps_interval': self.fps_interval,
+            'max_frames': self.max_frames,
+            'rembg_model': self.rembg_model,
+            'alpha_threshold': self.alpha_threshold,
+            'decoder': self.decoder,
+            'start_time': self.start_time,
+            'end_time': self.end_time
+        }
+
+    def restore_cached_frames(self, cached_frames: list) -> list:
+        """把缓存中的帧复制到frames目录（不保留帧文件时读入内存），按当前动作名重新命名"""
+        frame_list = []
+        for cached in cached_frames:
+            frame_name = self.get_frame_name(cached['index'])
+            frame_info = {k: v for k, v in cached.items() if k not in ('file', 'path', 'raw_size')}
+            frame_info.update({
+                'name': frame_name,
+                'action': self.action_name
+            })
+            frame_info.setdefault('source_rect', dict(frame_info['trim_info']))
+            
+            if not self.keep_frames:
+                frame_info['image'] = ExtractionCache.load_image(cached)
+            elif 'raw_size' in cached:
+                # 缓存由不保留帧文件的提取写入（原始像素），这里才需要编码PNG
+                frame_info['path'] = os.path.join(self.frames_dir, frame_name)
+                ExtractionCache.load_image(cached).save(frame_info['path'])
+            else:
+                frame_info['path'] = os.path.join(self.frames_dir, frame_name)
+                shutil.copyfile(cached['path'], frame_info['path'])
+            frame_list.append(frame_info)
+        return frame_list
+
+    def extract_frames(self, progress_callback=None, cancel_check=None, frame_callback=None) -> list:
+        """
+        提取视频帧、去除背景并自动裁剪
+        
+        Args:
+            progress_callback: 进度回调 callback(已完成帧数, 预计总帧数)，每完成一批调用一次
+            cancel_check: 取消检查函数，返回True时中止提取并抛出ExtractionCancelled
+            frame_callback: 帧回调 callback(frame_info, 源图)，在当前进程内完成的帧用内存中的像素调用，
+                            调用方不必再从PNG解码（命中缓存或由工作进程处理的帧不会回调）
+        """
         print("[第1步] 提取视频帧、去除背景并自动裁剪...")
         
         # 清除同名动作的旧frames
@@ -175,69 +537,176 @@ class VideoToSpriteSheet:
                 except Exception as e:
                     print(f"  无法删除 {filename}: {e}")
         
-        vidcap = cv2.VideoCapture(self.video_path)
-        if not vidcap.isOpened():
-            raise ValueError(f"无法打开视频: {self.video_path}")
+        # 命中提取缓存时直接恢复，不再解码和去背景
+        cache = None
+        if self.use_cache:
+            cache = ExtractionCache(os.path.join(self.output_dir, CACHE_DIR_NAME), self.cache_max_bytes)
+            cache_key = cache.make_key(self.video_path, self.cache_params())
+            cached_frames = cache.load(cache_key)
+            if cached_frames:
+                frame_list = self.restore_cached_frames(cached_frames)
+                if progress_callback is not None:
+                    progress_callback(len(frame_list), len(frame_list))
+                print(f"  命中提取缓存: {len(frame_list)} 张帧")
+                print()
+                return frame_list
         
-        fps = vidcap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # 视频信息来自探测缓存（GUI添加视频时已经探测过，不再重复读取容器）
+        probe = VideoProbe.open(self.video_path)
+        fps = probe.fps
+        # 跳帧采样时按视频实际的关键帧间隔决定是否改用seek（从起点附近只解复用少量关键帧，随探测结果缓存）
+        keyframe_interval = probe.keyframe_interval(self.start_time) if self.fps_interval > 1 else None
+        decoder = create_decoder(self.decoder, self.video_path, fps, keyframe_interval)
+        total_frames = probe.frame_count
         
+        print(f"  视频编码: {probe.codec}, 时长: {probe.duration:.2f}s")
         print(f"  视频FPS: {fps}")
         print(f"  总帧数: {total_frames}")
+        if self.has_time_range():
+            # 只解码范围内的帧
+            start_frame, end_frame = time_range_frames(fps, self.start_time, self.end_time)
+            total_frames = max(0, min(total_frames, end_frame or total_frames) - start_frame)
+            print(f"  时间范围: {self.format_time_range()} ({total_frames} 帧)")
         print(f"  正在处理帧（去除背景 + 自动裁剪）...")
         
+        # 预计提取的帧数（用于进度显示）
+        expected_frames = math.ceil(total_frames / self.fps_interval) if total_frames > 0 else 0
+        if self.max_frames:
+            expected_frames = min(expected_frames, self.max_frames) if expected_frames else self.max_frames
+        
+        def check_cancelled():
+            if cancel_check is not None and cancel_check():
+                raise ExtractionCancelled(f"已取消: {self.video_path}")
+        
         frame_list = []
-        count = 0
-        extracted = 0
-        success, image = vidcap.read()
-        
-        while success:
-            # 按间隔提取帧
-            if count % self.fps_interval == 0:
-                # 调整帧大小
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                resized = cv2.resize(image, (self.frame_size, self.frame_size))
-                
-                # 转换为PIL Image
-                pil_image = Image.fromarray(resized).convert('RGB')
-                
-                # 使用rembg去除背景
-                print(f"    处理第 {extracted + 1} 帧 (去除背景中...)")
-                pil_image_no_bg = remove(pil_image)
-                
-                # 自动裁剪透明边界
-                trimmed_image, trim_info = self.trim_image(pil_image_no_bg)
-                
-                # 保存裁剪后的帧
-                frame_name = self.get_frame_name(extracted)
-                frame_path = os.path.join(self.frames_dir, frame_name)
-                trimmed_image.save(frame_path)
-                
-                frame_list.append({
-                    'index': extracted,
+        pending = []  # 等待去背景的 (时间戳, RGB数组)
+        decoded = 0  # 已解码的采样帧数（决定帧序号）
+        in_flight = deque()  # 已提交给工作进程、尚未取回的批次（有界队列）
+        stage_times = {stage: 0.0 for stage in PIPELINE_STAGES}
+        
+        executor = None
+        if self.workers:
+            onnx_threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # 统一使用spawn启动子进程（与Windows行为一致，避免fork继承ONNX运行时状态）
+            executor = ProcessPoolExecutor(self.workers,
+                                           mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=_init_pipeline_worker,
+                                           initargs=(onnx_threads,))
+        
+        def collect(batch, result):
+            """按提交顺序取回一批结果，追加到frame_list"""
+            results, timings = result
+            for stage, elapsed in timings.items():
+                stage_times[stage] += elapsed
+            
+            start = len(frame_list)
+            print(f"    完成第 {start + 1}-{start + len(batch)} 帧 (去背景 + 裁剪)")
+            for (timestamp, _), (trim_info, source_rect, source_image) in zip(batch, results):
+                index = len(frame_list)
+                frame_name = self.get_frame_name(index)
+                frame_info = {
+                    'index': index,
                     'name': frame_name,
                     'action': self.action_name,
-                    'path': frame_path,
-                    'timestamp': count / fps,  # 时间戳（秒）
+                    'timestamp': timestamp - self.start_time,  # 时间戳（秒，从动作起点即时间范围起点算起）
                     'original_size': self.frame_size,
-                    'trim_info': trim_info
-                })
-                extracted += 1
-
-                if self.max_frames and extracted >= self.max_frames:
+                    'trim_info': trim_info,
+                    # 帧文件/图片保存的区域；之后修改trim_info不改动源图，装箱时再按新区域裁剪
+                    'source_rect': source_rect
+                }
+                if self.keep_frames:
+                    frame_info['path'] = os.path.join(self.frames_dir, frame_name)
+                else:
+                    frame_info['image'] = source_image
+                frame_list.append(frame_info)
+                if frame_callback is not None and source_image is not None:
+                    frame_callback(frame_info, source_image)
+            
+            if progress_callback is not None:
+                progress_callback(len(frame_list), max(expected_frames, len(frame_list)))
+            check_cancelled()
+        
+        def submit(batch):
+            """提交一批帧；有工作进程时异步执行，队列满则等待最早的一批"""
+            first_index = decoded - len(batch)
+            task = {
+                'model': self.rembg_model,
+                'batch_size': self.bg_batch_size,
+                'alpha_threshold': self.alpha_threshold,
+                'frames': [
+                    (os.path.join(self.frames_dir, self.get_frame_name(first_index + i)) if self.keep_frames else None,
+                     rgb)
+                    for i, (_, rgb) in enumerate(batch)
+                ],
+                # 回调需要像素时，在当前进程内处理的帧写完PNG也带回源图（不经过进程间传输）
+                'return_images': frame_callback is not None and executor is None
+            }
+            
+            if executor is None:
+                collect(batch, _process_frame_batch(task))
+                return
+            
+            in_flight.append((batch, executor.submit(_process_frame_batch, task)))
+            while len(in_flight) > self.workers * 2:
+                done_batch, future = in_flight.popleft()
+                collect(done_batch, future.result())
+        
+        try:
+            # 解码器产出已缩放到帧大小的RGB帧
+            sampled_frames = decoder.sampled_frames(self.fps_interval, self.frame_size,
+                                                    self.start_time, self.end_time)
+            while not self.max_frames or decoded < self.max_frames:
+                check_cancelled()
+                start = time.perf_counter()
+                item = next(sampled_frames, None)
+                if item is None:
                     break
+                
+                _, timestamp, resized = item
+                stage_times['decode'] += time.perf_counter() - start
+                
+                pending.append((timestamp, resized))
+                decoded += 1
+                
+                # 凑满一批后统一去背景
+                if len(pending) >= self.bg_batch_size:
+                    submit(pending)
+                    pending = []
+            
+            if pending:
+                submit(pending)
             
-            success, image = vidcap.read()
-            count += 1
+            while in_flight:
+                done_batch, future = in_flight.popleft()
+                collect(done_batch, future.result())
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            decoder.close()
+        
+        self.print_stage_throughput(stage_times, len(frame_list))
         
-        vidcap.release()
+        if cache is not None:
+            cache.store(cache_key, frame_list)
         
-        print(f"  提取完成: {extracted} 张帧（已去除背景并自动裁剪）")
-        print(f"  时间: 0s - {frame_list[-1]['timestamp']:.2f}s")
+        print(f"  提取完成: {len(frame_list)} 张帧（已去除背景并自动裁剪）")
+        if frame_list:
+            print(f"  时间: 0s - {frame_list[-1]['timestamp']:.2f}s")
         print()
         
         return frame_list
 
+    def print_stage_throughput(self, stage_times: dict, frame_count: int):
+        """打印流水线各阶段吞吐，便于定位瓶颈（工作进程阶段按所有进程累计耗时计算）"""
+        if not frame_count:
+            return
+        print("  各阶段吞吐:")
+        for stage in PIPELINE_STAGES:
+            elapsed = stage_times[stage]
+            # 没有耗时的阶段（如帧只保存在内存中时的save）不计算吞吐
+            rate = f"{frame_count / elapsed:8.1f} 帧/秒" if elapsed > 0 else f"{'-':>8s}"
+            print(f"    {stage:<7s} {elapsed:7.2f}s  {rate}")
+
     def create_sprite_sheets(self, frame_list: list) -> dict:
         """创建Sprite Sheet（自动排列裁剪后的图片）"""
         print("[第2步] 生成Sprite Sheet（自动排列）...")
@@ -251,126 +720,401 @@ class VideoToSpriteSheet:
         for idx, frame in enumerate(frame_list[:5]):  # Print first 5 frames
             print(f"[DEBUG]   Frame {idx}: {frame.get('name')} (action={frame.get('action')})")
         
-        sheets_info = []
-        current_sheet = Image.new('RGBA', (self.atlas_size, self.atlas_size), color=(0, 0, 0, 0))
-        current_x = 0
-        current_y = 0
-        max_height = 0
-        sheet_frames = []
-        sheet_idx = 0
+        if self.incremental or self.split_output:
+            sheets_info = self.build_units(frame_list)
+        else:
+            sheets_info = self.pack_frames(frame_list, self.file_prefix)
+            self.export_textures(sheets_info)
         
-        for frame_info in frame_list:
-            # 加载裁剪后的图片
-            frame_img = Image.open(frame_info['path']).convert('RGBA')
-            frame_w = frame_img.width
-            frame_h = frame_img.height
-            
-            # 如果该行放不下，换到下一行
-            if current_x + frame_w > self.atlas_size and current_x > 0:
-                current_x = 0
-                current_y += max_height + 2  # 加2像素间距
-                max_height = 0
+        # 按最终顺序重新编号，并删除本次没有用到的旧Sheet图片和压缩纹理
+        for sheet_idx, sheet in enumerate(sheets_info):
+            sheet['index'] = sheet_idx
+        self.remove_stale_files({sheet['image'] for sheet in sheets_info}, '.png')
+        self.remove_stale_files({v['file'] for sheet in sheets_info for v in sheet['variants']}, '.ktx2')
+        
+        if sheets_info:
+            total_occupancy = sum(sheet['occupancy'] for sheet in sheets_info) / len(sheets_info)
+            print(f"  总占用率: {total_occupancy:.1%} "
+                  f"({len(sheets_info)} 张 {self.atlas_size}x{self.atlas_size})")
+        
+        print(f"[DEBUG] create_sprite_sheets returning {len(sheets_info)} sheets")
+        for sheet in sheets_info:
+            print(f"[DEBUG]   Sheet {sheet['index']}: {len(sheet['frames'])} frames")
+        print()
+        return sheets_info
+
+    def pack_frames(self, frame_list: list, image_prefix: str) -> list:
+        """
+        把一组帧装箱成若干张Sheet并保存为 <image_prefix>_000.png ...
+        返回: [{'image': 图片文件名, 'frames': [帧信息], 'occupancy': 占用率}, ...]
+        """
+        # 加载裁剪后的图片；低内存模式下只读尺寸，合成每页时再逐帧从磁盘读入
+        if self.low_memory:
+            frame_images = None
+            sizes = [self.frame_image_size(frame_info) for frame_info in frame_list]
+        else:
+            frame_images = [self.load_frame_image(frame_info) for frame_info in frame_list]
+            sizes = [image.size for image in frame_images]
+        
+        # 合并重复帧：canonical[i]是第i帧在图集中实际使用的副本
+        if self.dedupe:
+            images = frame_images if frame_images is not None else map(self.load_frame_image, frame_list)
+            canonical = find_duplicates(images, self.dedupe_threshold)
+        else:
+            canonical = list(range(len(frame_list)))
+        unique = sorted(set(canonical))
+        if len(unique) < len(frame_list):
+            print(f"  重复帧合并: {len(frame_list)} 帧 -> {len(unique)} 张唯一图像"
+                  f"（{len(frame_list) - len(unique)} 帧复用已有区域）")
+        
+        # 只对唯一图像计算装箱位置，重复帧沿用其副本的位置；每帧占用的区域包含四周的外扩像素
+        packer = create_packer(self.packer, self.atlas_size, self.padding, self.allow_rotation)
+        extrude = self.extrude
+        unique_placements = packer.pack([
+            (sizes[i][0] + 2 * extrude, sizes[i][1] + 2 * extrude) for i in unique
+        ])
+        placement_of = dict(zip(unique, unique_placements))
+        placements = [placement_of[c] for c in canonical]
+        page_count = packer.page_count(unique_placements)
+        rotated_count = sum(1 for p in unique_placements if p['rotated'])
+        print(f"  装箱算法: {packer.name}" + (f"，旋转 {rotated_count} 帧" if rotated_count else ""))
+        
+        sheets_info = []
+        pages = []
+        for sheet_idx in range(page_count):
+            current_sheet = Image.new('RGBA', (self.atlas_size, self.atlas_size), color=(0, 0, 0, 0))
+            sheet_frames = []
+            used_area = 0
             
-            # 如果超出高度，创建新Sheet
-            if current_y + frame_h > self.atlas_size:
-                # 保存当前Sheet
-                sheet_data = {
-                    'index': sheet_idx,
-                    'frames': sheet_frames
-                }
-                sheets_info.append(sheet_data)
-                
-                # 创建新Sheet
-                sheet_path = os.path.join(self.output_dir, f"spritesheet_{sheet_idx:03d}.png")
-                current_sheet.save(sheet_path)
+            for i, (frame_info, (frame_w, frame_h), placement) in enumerate(zip(frame_list, sizes, placements)):
+                if placement['page'] != sheet_idx:
+                    continue
                 
-                current_sheet = Image.new('RGBA', (self.atlas_size, self.atlas_size), color=(0, 0, 0, 0))
-                current_x = 0
-                current_y = 0
-                max_height = 0
-                sheet_frames = []
-                sheet_idx += 1
+                current_x, current_y = placement['x'] + extrude, placement['y'] + extrude
+                rotated = placement['rotated']
+                if canonical[i] == i:
+                    # 粘贴图片（旋转的帧顺时针转90°，再外扩边缘）；各帧区域互不重叠，直接覆盖写入，
+                    # 不用自身做mask，否则半透明边缘的alpha会被乘两次
+                    frame_img = frame_images[i] if frame_images is not None else self.load_frame_image(frame_info)
+                    sheet_img = frame_img.transpose(Image.Transpose.ROTATE_270) if rotated else frame_img
+                    current_sheet.paste(self.extrude_image(sheet_img, extrude), (placement['x'], placement['y']))
+                    used_area += frame_w * frame_h
                 
-                print(f"  Sheet {sheet_idx - 1}: {len(sheet_frames)} 帧 -> {sheet_path}")
+                # 记录帧信息（TexturePacker格式，frame的w/h始终是未旋转时的大小）
+                sheet_frames.append({
+                    'original_index': frame_info['index'],
+                    'name': frame_info.get('name', f"frame_{frame_info['index']:05d}.png"),
+                    'action': frame_info.get('action'),
+                    'frame': {
+                        'x': current_x,
+                        'y': current_y,
+                        'w': frame_w,
+                        'h': frame_h
+                    },
+                    'rotated': rotated,
+                    'trimmed': True,
+                    'spriteSourceSize': {
+                        'x': frame_info['trim_info']['x'],
+                        'y': frame_info['trim_info']['y'],
+                        'w': frame_info['trim_info']['w'],
+                        'h': frame_info['trim_info']['h']
+                    },
+                    'sourceSize': {
+                        'w': frame_info['original_size'],
+                        'h': frame_info['original_size']
+                    },
+                    'timestamp': frame_info['timestamp']
+                })
             
-            # 粘贴图片
-            current_sheet.paste(frame_img, (current_x, current_y), frame_img)
+            occupancy = used_area / (self.atlas_size * self.atlas_size)
+            sheet_image = f"{image_prefix}_{sheet_idx:03d}.png"
+            sheets_info.append({
+                'image': sheet_image,
+                'frames': sheet_frames,
+                'occupancy': occupancy
+            })
+            if self.premultiply:
+                current_sheet = premultiply_alpha(current_sheet)
             
-            # 记录帧信息（TexturePacker格式）
-            sheet_frames.append({
-                'original_index': frame_info['index'],
-                'name': frame_info.get('name', f"frame_{frame_info['index']:05d}.png"),
-                'action': frame_info.get('action'),
-                'frame': {
-                    'x': current_x,
-                    'y': current_y,
-                    'w': frame_w,
-                    'h': frame_h
-                },
-                'rotated': False,
-                'trimmed': True,
-                'spriteSourceSize': {
-                    'x': frame_info['trim_info']['x'],
-                    'y': frame_info['trim_info']['y'],
-                    'w': frame_info['trim_info']['w'],
-                    'h': frame_info['trim_info']['h']
-                },
-                'sourceSize': {
-                    'w': frame_info['original_size'],
-                    'h': frame_info['original_size']
-                },
+            print(f"  Sheet {sheet_image}: {len(sheet_frames)} 帧, 占用率 {occupancy:.1%}")
+            if self.low_memory:
+                # 每页合成后立即保存并释放，内存中始终只有一页
+                self.save_sheets([(sheet_image, current_sheet)])
+            else:
+                pages.append((sheet_image, current_sheet))
+        
+        self.save_sheets(pages)
+        return sheets_info
+
+    def save_sheets(self, pages: list):
+        """按png_profile并行编码并保存Sheet图片，输出每页相对RGBA原始像素（宽*高*4字节）的压缩效果"""
+        if not pages:
+            return
+        
+        def save(page):
+            sheet_image, sheet = page
+            return save_png(sheet, os.path.join(self.output_dir, sheet_image), self.png_profile)
+        
+        with ThreadPoolExecutor(max_workers=min(len(pages), os.cpu_count() or 1)) as executor:
+            sizes = list(executor.map(save, pages))
+        
+        for (sheet_image, sheet), size in zip(pages, sizes):
+            # 以原始像素大小为基准，不为统计再编码一次
+            raw = sheet.width * sheet.height * 4
+            print(f"  保存 {os.path.join(self.output_dir, sheet_image)} ({self.png_profile}: "
+                  f"{raw / 1024:.1f}KB -> {size / 1024:.1f}KB, {size / raw - 1:+.1%})")
+
+    def pack_settings(self) -> dict:
+        """影响Sheet内容的参数（增量构建时任一参数变化都会使全部动作重新装箱）"""
+        return {
+            'atlas_size': self.atlas_size,
+            'packer': self.packer,
+            'allow_rotation': self.allow_rotation,
+            'dedupe': self.dedupe,
+            'dedupe_threshold': self.dedupe_threshold,
+            'png_profile': self.png_profile,
+            'padding': self.padding,
+            'extrude': self.extrude,
+            'premultiply': self.premultiply,
+            'scale': self.scale
+        }
+
+    @staticmethod
+    def action_digest(frame_list: list) -> str:
+        """一个动作所有帧的内容哈希：帧图片（文件字节或内存中的像素）+ 裁剪信息、名称、时间戳等元数据"""
+        sha = hashlib.sha1()
+        for frame_info in frame_list:
+            sha.update(json.dumps({
+                'index': frame_info['index'],
+                'name': frame_info.get('name'),
+                'trim_info': frame_info['trim_info'],
+                'original_size': frame_info['original_size'],
                 'timestamp': frame_info['timestamp']
-            })
+            }, sort_keys=True).encode())
+            if 'path' in frame_info:
+                with open(frame_info['path'], 'rb') as f:
+                    sha.update(hashlib.sha1(f.read()).digest())
+            else:
+                image = frame_info['image']
+                sha.update(f"{image.width}x{image.height}".encode())
+                sha.update(hashlib.sha1(image.tobytes()).digest())
+        return sha.hexdigest()
+
+    def pack_unit(self, action: str) -> str:
+        """动作所属的装箱单元：在action_groups中的动作归入其分组，其他动作各自一个单元"""
+        for group, actions in self.action_groups.items():
+            if action in actions:
+                return group
+        return action
+
+    def build_units(self, frame_list: list) -> list:
+        """
+        按装箱单元（动作或动作分组）分别装箱成 <前缀>_<单元名>_000.png ...
+        增量模式下内容哈希未变化的单元直接复用上次的Sheet，只重新装箱和编码变化了的单元
+        """
+        # 按单元分组（保持首次出现的顺序）
+        units = {}
+        for frame_info in frame_list:
+            unit = self.pack_unit(frame_info.get('action') or self.action_name)
+            units.setdefault(unit, []).append(frame_info)
+        
+        state_path = os.path.join(self.output_dir, f".{self.file_prefix}_state.json")
+        settings = self.pack_settings()
+        reusable = set()
+        built = {}
+        if self.incremental:
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('version') != BUILD_STATE_VERSION or state.get('settings') != settings:
+                    print("  装箱参数已变化，全部动作重新装箱")
+                    state = {}
+            except (OSError, ValueError):
+                state = {}
+            old_units = state.get('units', {})
             
-            # 更新坐标
-            current_x += frame_w + 2  # 加2像素间距
-            max_height = max(max_height, frame_h)
-        
-        # 保存最后一张Sheet
-        if sheet_frames:
-            sheet_data = {
-                'index': sheet_idx,
-                'frames': sheet_frames
+            digests = {unit: self.action_digest(frames) for unit, frames in units.items()}
+            reusable = {
+                unit for unit, digest in digests.items()
+                if unit in old_units and old_units[unit]['hash'] == digest
+                and all(os.path.exists(os.path.join(self.output_dir, sheet['image']))
+                        for sheet in old_units[unit]['sheets'])
             }
-            sheets_info.append(sheet_data)
-            print(f"[DEBUG] Saved final sheet {sheet_idx} with {len(sheet_frames)} frames")
-            
-            sheet_path = os.path.join(self.output_dir, f"spritesheet_{sheet_idx:03d}.png")
-            current_sheet.save(sheet_path)
             
-            print(f"  Sheet {sheet_idx}: {len(sheet_frames)} 帧 -> {sheet_path}")
+            # 先把要重建的单元从状态中移除再写Sheet，中途失败也不会误用写了一半的图片
+            built = {unit: old_units[unit] for unit in reusable}
+            if len(reusable) < len(units):
+                self.write_build_state(state_path, settings, built)
         
-        print(f"[DEBUG] create_sprite_sheets returning {len(sheets_info)} sheets")
-        for sheet in sheets_info:
-            print(f"[DEBUG]   Sheet {sheet['index']}: {len(sheet['frames'])} frames")
-        print()
+        sheets_info = []
+        for unit, frames in units.items():
+            if unit in reusable:
+                sheets = built[unit]['sheets']
+                print(f"  动作 {unit}: 未变化，复用 {len(sheets)} 张Sheet")
+            else:
+                print(f"  动作 {unit}: 装箱 {len(frames)} 帧")
+                sheets = self.pack_frames(frames, f"{self.file_prefix}_{unit}")
+                for sheet in sheets:
+                    sheet['unit'] = unit
+                if self.incremental:
+                    built[unit] = {'hash': digests[unit], 'sheets': sheets}
+            sheets_info.extend(sheets)
+        
+        # 在保存状态之前导出压缩纹理，复用的Sheet下次也能直接复用其KTX2
+        self.export_textures(sheets_info)
+        
+        if self.incremental:
+            self.write_build_state(state_path, settings, built)
+            print(f"  增量构建: 重新装箱 {len(units) - len(reusable)} 个动作，复用 {len(reusable)} 个动作")
         return sheets_info
 
+    @staticmethod
+    def write_build_state(state_path: str, settings: dict, units: dict):
+        """保存增量构建状态（每个装箱单元的内容哈希和Sheet信息）"""
+        write_json_atomic(state_path, {
+            'version': BUILD_STATE_VERSION,
+            'settings': settings,
+            'units': {
+                unit: {
+                    'hash': entry['hash'],
+                    'sheets': [{k: v for k, v in sheet.items() if k != 'index'} for sheet in entry['sheets']]
+                }
+                for unit, entry in units.items()
+            }
+        })
+
+    def export_textures(self, sheets_info: list):
+        """
+        按texture_format为每张Sheet导出KTX2压缩纹理，结果记录在 sheet['variants']
+        已导出过同一格式且文件仍存在的Sheet直接复用，多张Sheet并行编码
+        """
+        if self.texture_format == 'png':
+            for sheet in sheets_info:
+                sheet['variants'] = []
+            return
+        
+        format_name = KTX2_FORMAT_NAMES[self.texture_format]
+        pending = []
+        for sheet in sheets_info:
+            sheet['variants'] = [
+                variant for variant in sheet.get('variants', [])
+                if variant['format'] == format_name
+                and os.path.exists(os.path.join(self.output_dir, variant['file']))
+            ]
+            if not sheet['variants']:
+                pending.append(sheet)
+        
+        if not pending:
+            return
+        
+        encoder = find_encoder(self.texture_format)
+        if encoder is None:
+            print(f"  警告: 未找到支持 {self.texture_format} 的KTX2编码器（toktx / basisu），只输出PNG")
+            return
+        
+        print(f"  导出压缩纹理 {format_name}（{encoder[0]}）: {len(pending)} 张Sheet")
+        with ThreadPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1)) as executor:
+            futures = [
+                (sheet, executor.submit(export_ktx2, os.path.join(self.output_dir, sheet['image']),
+                                        self.texture_format, encoder))
+                for sheet in pending
+            ]
+            for sheet, future in futures:
+                try:
+                    ktx2_path = future.result()
+                except (RuntimeError, OSError) as e:
+                    print(f"  警告: {sheet['image']} 导出KTX2失败: {e}")
+                    continue
+                
+                png_bytes = os.path.getsize(os.path.join(self.output_dir, sheet['image']))
+                ktx2_bytes = os.path.getsize(ktx2_path)
+                sheet['variants'] = [{
+                    'file': os.path.basename(ktx2_path),
+                    'format': format_name,
+                    'bytes': ktx2_bytes
+                }]
+                print(f"    {sheet['image']} ({png_bytes / 1024:.1f}KB) -> "
+                      f"{os.path.basename(ktx2_path)} ({ktx2_bytes / 1024:.1f}KB)")
+
+    def remove_stale_files(self, keep_names: set, extension: str):
+        """删除输出目录中当前缩放比例下不再被引用的 <前缀>_*<extension>（旧的Sheet图片、分组清单）"""
+        for file_name in os.listdir(self.output_dir):
+            if (file_name.startswith(f"{self.file_prefix}_") and file_name.endswith(extension)
+                    and file_name not in keep_names):
+                try:
+                    os.remove(os.path.join(self.output_dir, file_name))
+                    print(f"  删除旧文件: {file_name}")
+                except OSError as e:
+                    print(f"  警告: 无法删除旧文件 {file_name}: {e}")
+
+    def build_atlases(self, frame_list: list) -> dict:
+        """
+        为每个缩放比例生成一套Sheet和元数据
+        帧只提取一次，低分辨率版本由全分辨率的去背景/裁剪结果直接缩小得到
+        返回: {缩放比例: 该比例的master metadata}
+        """
+        results = {}
+        try:
+            for scale in self.scales:
+                self.scale = scale
+                if len(self.scales) > 1:
+                    print(f"[缩放 {scale:g}x] 输出前缀: {self.file_prefix}")
+                scaled_frames = frame_list if scale == 1 else [self.scale_frame(f, scale) for f in frame_list]
+                sheets_info = self.create_sprite_sheets(scaled_frames)
+                results[scale] = self.generate_metadata(sheets_info, len(frame_list))
+        finally:
+            self.scale = 1.0
+        
+        self.remove_stale_variants()
+        return results
+
+    def remove_stale_variants(self):
+        """删除已不在scales中的缩放版本的全部输出文件"""
+        keep = {self.variant_prefix(scale) for scale in self.scales}
+        for file_name in os.listdir(self.output_dir):
+            match = _VARIANT_FILE_PATTERN.match(file_name)
+            if match and match.group(1) not in keep:
+                try:
+                    os.remove(os.path.join(self.output_dir, file_name))
+                    print(f"  删除旧缩放版本文件: {file_name}")
+                except OSError as e:
+                    print(f"  警告: 无法删除 {file_name}: {e}")
+
     def generate_metadata(self, sheets_info: list, frame_count: int) -> dict:
         """生成TexturePacker格式的JSON元数据（统一的单个JSON包含所有帧）"""
         print("[第3步] 生成TexturePacker格式元数据...")
         print(f"[DEBUG] generate_metadata: {len(sheets_info)} sheets, {frame_count} total frames")
         
+        # 每页的PNG及其压缩纹理；meta.format和image一样描述PNG，KTX2只出现在各页的variants中
+        pages = [{
+            'image': sheet_data['image'],
+            'format': PNG_FORMAT_NAME,
+            'variants': sheet_data.get('variants', [])
+        } for sheet_data in sheets_info]
+        
         # 创建统一的master metadata，包含所有帧
         master_metadata = {
             'meta': {
                 'app': 'VideoToSpriteSheet',
                 'version': '1.0',
                 'sheets': len(sheets_info),  # 记录总sheet数
-                'format': 'RGBA8888',
+                'format': PNG_FORMAT_NAME,
+                'pages': pages,
                 'size': {
                     'w': self.atlas_size,
                     'h': self.atlas_size
                 },
-                'scale': '1'
+                'scale': f"{self.scale:g}",
+                'premultipliedAlpha': self.premultiply,
+                'padding': self.padding,
+                'extrude': self.extrude
             },
             'frames': {}
         }
         
         # 将所有sheet的frames合并到一个frames字典中
         for sheet_data in sheets_info:
-            sheet_idx = sheet_data['index']
-            sheet_image = f'spritesheet_{sheet_idx:03d}.png'
+            sheet_image = sheet_data['image']
             
             for frame_info in sheet_data['frames']:
                 frame_name = frame_info.get('name', f"frame_{frame_info['original_index']:05d}.png")
@@ -400,12 +1144,15 @@ class VideoToSpriteSheet:
                 }
         
         # 保存统一的master JSON
-        master_json_path = os.path.join(self.output_dir, 'spritesheet.json')
-        with open(master_json_path, 'w', encoding='utf-8') as f:
-            json.dump(master_metadata, f, ensure_ascii=False, indent=2)
+        master_json_path = os.path.join(self.output_dir, f"{self.file_prefix}.json")
+        write_json_atomic(master_json_path, master_metadata, indent=2)
         
         print(f"  统一元数据 -> {master_json_path} ({len(master_metadata['frames'])} 帧，跨 {len(sheets_info)} 个PNG)")
         
+        # 分组输出：每组一个清单 + 顶层索引；关闭时删除以前留下的清单
+        written = self.write_split_manifests(sheets_info, master_metadata) if self.split_output else set()
+        self.remove_stale_files(written, '.json')
+        
         print(f"  总Sheet数: {len(sheets_info)}")
         print(f"  总帧数: {frame_count}")
         print()
@@ -413,6 +1160,59 @@ class VideoToSpriteSheet:
         # 返回master metadata
         return master_metadata
 
+    def write_split_manifests(self, sheets_info: list, master_metadata: dict) -> set:
+        """
+        为每个装箱单元写一个清单 <前缀>_<单元名>.manifest.json（格式与<前缀>.json相同，只含该单元的帧；
+        单独的后缀保证任何动作/分组名都不会与索引 <前缀>_index.json 重名），
+        并写顶层索引: 动作 -> 所在分组、清单、图片及字节数
+        返回: 写出的文件名集合
+        """
+        units = {}
+        for sheet_data in sheets_info:
+            units.setdefault(sheet_data['unit'], []).append(sheet_data)
+        
+        index = {
+            'meta': {k: v for k, v in master_metadata['meta'].items() if k not in ('sheets', 'pages')},
+            'actions': {}
+        }
+        index_name = f"{self.file_prefix}_index.json"
+        written = {index_name}
+        for unit, sheets in units.items():
+            images = {sheet['image'] for sheet in sheets}
+            manifest_name = f"{self.file_prefix}_{unit}.manifest.json"
+            manifest_path = os.path.join(self.output_dir, manifest_name)
+            write_json_atomic(manifest_path, {
+                'meta': dict(master_metadata['meta'], sheets=len(sheets),
+                             pages=[page for page in master_metadata['meta']['pages'] if page['image'] in images]),
+                'frames': {
+                    name: frame for name, frame in master_metadata['frames'].items()
+                    if frame['image'] in images
+                }
+            }, indent=2)
+            written.add(manifest_name)
+            
+            image_entries = [{
+                'file': sheet['image'],
+                'bytes': os.path.getsize(os.path.join(self.output_dir, sheet['image'])),
+                'variants': sheet.get('variants', [])
+            } for sheet in sheets]
+            total_bytes = os.path.getsize(manifest_path) + sum(entry['bytes'] for entry in image_entries)
+            actions = sorted({frame['action'] or self.action_name for sheet in sheets for frame in sheet['frames']})
+            for action in actions:
+                index['actions'][action] = {
+                    'group': unit,
+                    'manifest': manifest_name,
+                    'images': image_entries,
+                    'bytes': total_bytes
+                }
+            print(f"  分组 {unit} ({', '.join(actions)}) -> {manifest_name}, "
+                  f"{len(sheets)} 个PNG, 共 {total_bytes / 1024:.1f}KB")
+        
+        index_path = os.path.join(self.output_dir, index_name)
+        write_json_atomic(index_path, index, indent=2)
+        print(f"  动作索引 -> {index_path} ({len(index['actions'])} 个动作)")
+        return written
+
     def run(self):
         """执行完整流程"""
         try:
@@ -423,16 +1223,14 @@ class VideoToSpriteSheet:
                 print("错误: 未能提取任何帧!")
                 return False
             
-            # 2. 创建Sprite Sheet
-            sheets_info = self.create_sprite_sheets(frame_list)
+            # 2. 创建Sprite Sheet并生成元数据（每个缩放比例一套）
+            metadata = self.build_atlases(frame_list)
             
-            # 3. 生成元数据
-            metadata = self.generate_metadata(sheets_info, len(frame_list))
-            
-            # 4. 生成总结
+            # 3. 生成总结
             print("[完成]")
             print(f"✓ 输出目录: {self.output_dir}")
-            print(f"✓ Sprite Sheets: {len(sheets_info)} 张")
+            for scale, variant in metadata.items():
+                print(f"✓ Sprite Sheets @{scale:g}x: {variant['meta']['sheets']} 张")
             print(f"✓ 总帧数: {len(frame_list)} 张")
             print(f"✓ 每帧原始大小: {self.frame_size}x{self.frame_size} 像素")
             print(f"✓ 输出格式: TexturePacker")
@@ -457,15 +1255,94 @@ def main():
     parser.add_argument('--frame-size', '-fs', type=int, default=256, help='单帧大小 (默认: 256)')
     parser.add_argument('--atlas-size', '-as', type=int, default=1024, help='Sprite Sheet大小 (默认: 1024)')
     parser.add_argument('--fps-interval', '-fps', type=int, default=30, help='帧间隔，FPS数值 (默认: 30，1秒取1张)')
+    parser.add_argument('--model', '-m', choices=REMBG_MODELS, default=DEFAULT_REMBG_MODEL,
+                        help=f'去背景模型 (默认: {DEFAULT_REMBG_MODEL})')
+    parser.add_argument('--decoder', choices=DECODERS, default=DEFAULT_DECODER,
+                        help='视频解码后端: opencv / pyav（FFmpeg多线程解码并直接缩放，需要 pip install av）'
+                             f' (默认: {DEFAULT_DECODER})')
+    parser.add_argument('--start-time', '-ss', type=float, default=0.0,
+                        help='从该时间（秒）开始提取，直接定位过去不解码之前的帧 (默认: 0)')
+    parser.add_argument('--end-time', '-to', type=float, default=None,
+                        help='提取到该时间（秒）为止，到达后停止解码 (默认: 视频结尾)')
+    parser.add_argument('--bg-batch-size', type=int, default=4, help='去背景每次推理的帧数 (默认: 4)')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                        help='流水线工作进程数，0表示单进程串行 (默认: 0)')
+    parser.add_argument('--alpha-threshold', '-at', type=int, default=0,
+                        help='自动裁剪的alpha阈值，alpha大于该值才算内容 (默认: 0)')
+    parser.add_argument('--no-cache', action='store_true', help='不使用提取缓存，强制重新提取')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help=f'提取缓存大小上限MB (默认: {DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--packer', choices=PACKERS, default=DEFAULT_PACKER,
+                        help=f'Sprite Sheet装箱算法 (默认: {DEFAULT_PACKER})')
+    parser.add_argument('--allow-rotation', action='store_true',
+                        help='装箱时允许把帧旋转90°以提高利用率（客户端需支持rotated）')
+    parser.add_argument('--no-dedupe', action='store_true', help='不合并重复帧，每帧单独占用图集区域')
+    parser.add_argument('--dedupe-threshold', type=int, default=0,
+                        help='近似重复帧的感知哈希汉明距离阈值，0表示只合并完全相同的帧 (默认: 0)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量构建：每个动作单独成页，只重新装箱内容变化了的动作')
+    parser.add_argument('--png-profile', choices=PNG_PROFILES, default=DEFAULT_PNG_PROFILE,
+                        help='Sheet PNG编码: lossless最大无损压缩 / clean-alpha清理透明像素后无损压缩 / '
+                             f'palette 256色调色板量化 (默认: {DEFAULT_PNG_PROFILE})')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0],
+                        help='输出的缩放版本，如 1 0.5 0.25，只提取一次 (默认: 1)')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='低内存流式装箱：逐页从磁盘读入帧合成，内存峰值约为一页加一帧')
+    parser.add_argument('--keep-frames', action='store_true',
+                        help='把裁剪后的帧保存为 frames/*.png（默认只在内存中交给装箱，--low-memory时总会保存）')
+    parser.add_argument('--padding', type=int, default=2, help='Sheet中相邻帧之间的透明间距px (默认: 2)')
+    parser.add_argument('--extrude', type=int, default=0,
+                        help='每帧四周重复边缘像素的宽度px，防止线性过滤/mipmap串色 (默认: 0)')
+    parser.add_argument('--premultiply-alpha', action='store_true',
+                        help='输出预乘alpha的Sheet（meta.premultipliedAlpha=true）')
+    parser.add_argument('--texture-format', choices=TEXTURE_FORMATS, default=DEFAULT_TEXTURE_FORMAT,
+                        help='额外导出KTX2压缩纹理: etc1s / uastc (Basis Universal) / astc，'
+                             f'需要toktx或basisu (默认: {DEFAULT_TEXTURE_FORMAT}，只输出PNG)')
+    parser.add_argument('--split-output', action='store_true',
+                        help=f'分组输出：每个动作/分组单独成页并写清单 {OUTPUT_PREFIX}_<分组>.manifest.json，另写 {OUTPUT_PREFIX}_index.json')
+    parser.add_argument('--action-group', action='append', default=[], metavar='NAME=ACTION,ACTION',
+                        help='把多个动作装进同一组Sheet，可重复指定（如 attack=attack1,attack2）')
     
     args = parser.parse_args()
     
+    action_groups = {}
+    for spec in args.action_group:
+        name, sep, actions = spec.partition('=')
+        if not sep or not name or not actions:
+            parser.error(f"--action-group 格式应为 NAME=ACTION,ACTION: {spec}")
+        action_groups[name] = [a for a in actions.split(',') if a]
+    
     converter = VideoToSpriteSheet(
         video_path=args.video,
         output_dir=args.output,
         frame_size=args.frame_size,
         atlas_size=args.atlas_size,
-        fps_interval=args.fps_interval
+        fps_interval=args.fps_interval,
+        rembg_model=args.model,
+        bg_batch_size=args.bg_batch_size,
+        workers=args.workers,
+        alpha_threshold=args.alpha_threshold,
+        use_cache=not args.no_cache,
+        cache_max_bytes=args.cache_size_mb * 1024 * 1024,
+        packer=args.packer,
+        allow_rotation=args.allow_rotation,
+        dedupe=not args.no_dedupe,
+        dedupe_threshold=args.dedupe_threshold,
+        incremental=args.incremental,
+        split_output=args.split_output,
+        action_groups=action_groups,
+        texture_format=args.texture_format,
+        png_profile=args.png_profile,
+        padding=args.padding,
+        extrude=args.extrude,
+        premultiply=args.premultiply_alpha,
+        scales=args.scales,
+        low_memory=args.low_memory,
+        # 流式装箱需要从磁盘逐帧读入
+        keep_frames=args.keep_frames or args.low_memory,
+        decoder=args.decoder,
+        start_time=args.start_time,
+        end_time=args.end_time
     )
     
     success = converter.run()
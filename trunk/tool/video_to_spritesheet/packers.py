@@ -0,0 +1,289 @@
+"""
+Sprite Sheet 装箱算法
+所有装箱器实现同一接口: pack(sizes) -> 每个矩形的放置位置 {'page', 'x', 'y', 'rotated'}
+放不下的矩形自动进入下一页
+rotated为True表示该矩形顺时针旋转90°后放入，在页面上占 h x w（与TexturePacker一致）
+"""
+
+
+class Packer:
+    """
+    装箱器基类
+    子类实现 new_page() 和 insert(state, w, h)，多页调度、间距和排序由基类统一处理
+    """
+
+    name = None
+
+    def __init__(self, atlas_size: int, padding: int = 2, allow_rotation: bool = False):
+        """
+        Args:
+            atlas_size: 页面大小（像素，正方形）
+            padding: 相邻帧之间的间距（像素）
+            allow_rotation: 是否允许把矩形旋转90°放入（仅在旋转后得分更好时才旋转）
+        """
+        self.atlas_size = atlas_size
+        self.padding = padding
+        self.allow_rotation = allow_rotation
+        # 每个矩形右/下各加padding，页面也加padding，这样贴边的帧不会浪费间距
+        self.bin_size = atlas_size + padding
+
+    def sort_order(self, sizes: list) -> list:
+        """放置顺序（矩形下标列表），默认按长边、面积从大到小"""
+        return sorted(range(len(sizes)), key=lambda i: (-max(sizes[i]), -sizes[i][0] * sizes[i][1]))
+
+    def new_page(self):
+        """创建一页的空闲空间状态"""
+        raise NotImplementedError
+
+    def insert(self, state, w: int, h: int):
+        """在页面中放入 w x h 的矩形，返回 (x, y, 是否旋转)，放不下返回None"""
+        raise NotImplementedError
+
+    def orientations(self, w: int, h: int) -> list:
+        """可尝试的放置方向 [(w, h, 是否旋转), ...]，不旋转的方向在前（得分相同时优先不旋转）"""
+        if self.allow_rotation and w != h:
+            return [(w, h, False), (h, w, True)]
+        return [(w, h, False)]
+
+    def pack(self, sizes: list) -> list:
+        """
+        装箱
+        Args:
+            sizes: [(w, h), ...]
+        返回: 与sizes一一对应的 [{'page': int, 'x': int, 'y': int, 'rotated': bool}, ...]
+        """
+        for w, h in sizes:
+            if w > self.atlas_size or h > self.atlas_size:
+                raise ValueError(f"帧大小 {w}x{h} 超过Atlas大小 {self.atlas_size}x{self.atlas_size}")
+
+        placements = self.pack_pages(sizes)
+        if self.allow_rotation:
+            # 贪心放置时旋转不一定更优，再按不旋转装一次，页数不多于旋转结果时用不旋转的
+            self.allow_rotation = False
+            try:
+                plain = self.pack_pages(sizes)
+            finally:
+                self.allow_rotation = True
+            if self.page_count(plain) <= self.page_count(placements):
+                placements = plain
+
+        return placements
+
+    @staticmethod
+    def page_count(placements: list) -> int:
+        """装箱结果占用的页数"""
+        return max((p['page'] for p in placements), default=-1) + 1
+
+    def pack_pages(self, sizes: list) -> list:
+        """按当前设置装箱一次，一页放不下的矩形进入下一页"""
+        placements = [None] * len(sizes)
+        remaining = self.sort_order(sizes)
+
+        page = 0
+        while remaining:
+            state = self.new_page()
+            leftover = []
+            for i in remaining:
+                w, h = sizes[i]
+                position = self.insert(state, w + self.padding, h + self.padding)
+                if position is None:
+                    leftover.append(i)
+                else:
+                    x, y, rotated = position
+                    placements[i] = {'page': page, 'x': x, 'y': y, 'rotated': rotated}
+            remaining = leftover
+            page += 1
+
+        return placements
+
+
+class ShelfPacker(Packer):
+    """行式装箱（旧算法）：按输入顺序从左到右排列，放不下就换行（不旋转）"""
+
+    name = 'shelf'
+
+    def sort_order(self, sizes: list) -> list:
+        return list(range(len(sizes)))
+
+    def new_page(self):
+        # [当前x, 当前y, 当前行高]
+        return [0, 0, 0]
+
+    def insert(self, state, w: int, h: int):
+        x, y, row_height = state
+        # 如果该行放不下，换到下一行
+        if x + w > self.bin_size and x > 0:
+            x, y, row_height = 0, y + row_height, 0
+        if x + w > self.bin_size or y + h > self.bin_size:
+            return None
+        state[:] = [x + w, y, max(row_height, h)]
+        return x, y, False
+
+
+class MaxRectsPacker(Packer):
+    """
+    MaxRects装箱：维护所有极大空闲矩形，按启发式选择放置位置
+    bssf: 短边剩余最小 / blsf: 长边剩余最小 / baf: 剩余面积最小
+    """
+
+    HEURISTICS = ('bssf', 'blsf', 'baf')
+
+    def __init__(self, atlas_size: int, padding: int = 2, allow_rotation: bool = False,
+                 heuristic: str = 'bssf'):
+        super().__init__(atlas_size, padding, allow_rotation)
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"不支持的MaxRects启发式: {heuristic}（可选: {', '.join(self.HEURISTICS)}）")
+        self.heuristic = heuristic
+        self.name = f'maxrects-{heuristic}'
+
+    def new_page(self):
+        # 空闲矩形列表 [(x, y, w, h), ...]
+        return [(0, 0, self.bin_size, self.bin_size)]
+
+    def score(self, free_w: int, free_h: int, w: int, h: int) -> tuple:
+        """放入某个空闲矩形的得分，越小越好"""
+        short_side = min(free_w - w, free_h - h)
+        long_side = max(free_w - w, free_h - h)
+        if self.heuristic == 'bssf':
+            return short_side, long_side
+        if self.heuristic == 'blsf':
+            return long_side, short_side
+        return free_w * free_h - w * h, short_side
+
+    def insert(self, state, w: int, h: int):
+        best = None
+        for rw, rh, rotated in self.orientations(w, h):
+            for fx, fy, fw, fh in state:
+                if rw <= fw and rh <= fh:
+                    score = self.score(fw, fh, rw, rh)
+                    if best is None or score < best[0]:
+                        best = (score, fx, fy, rw, rh, rotated)
+
+        if best is None:
+            return None
+
+        _, x, y, rw, rh, rotated = best
+        self.split_free_rects(state, x, y, rw, rh)
+        return x, y, rotated
+
+    @staticmethod
+    def split_free_rects(free_rects: list, x: int, y: int, w: int, h: int):
+        """从空闲矩形中扣除已放置的矩形，并去掉被其他空闲矩形包含的冗余矩形"""
+        result = []
+        for fx, fy, fw, fh in free_rects:
+            # 不相交的空闲矩形保持不变
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                result.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                result.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                result.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                result.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                result.append((fx, y + h, fw, fy + fh - y - h))
+
+        # 去除被包含的矩形
+        pruned = []
+        for i, (ax, ay, aw, ah) in enumerate(result):
+            contained = False
+            for j, (bx, by, bw, bh) in enumerate(result):
+                if i != j and bx <= ax and by <= ay and ax + aw <= bx + bw and ay + ah <= by + bh:
+                    # 完全相同的矩形只保留第一个
+                    if (ax, ay, aw, ah) != (bx, by, bw, bh) or j < i:
+                        contained = True
+                        break
+            if not contained:
+                pruned.append((ax, ay, aw, ah))
+
+        free_rects[:] = pruned
+
+
+class SkylinePacker(Packer):
+    """Skyline装箱（bottom-left）：维护页面顶部轮廓线，放在使矩形上沿最低的位置"""
+
+    name = 'skyline'
+
+    def sort_order(self, sizes: list) -> list:
+        # 可旋转时高度不固定，改用基类的按长边排序
+        if self.allow_rotation:
+            return super().sort_order(sizes)
+        return sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+
+    def new_page(self):
+        # 轮廓线段列表 [[x, y, 宽度], ...]，从左到右覆盖整页宽度
+        return [[0, 0, self.bin_size]]
+
+    def fit(self, skyline: list, index: int, w: int, h: int):
+        """矩形左边对齐第index段时的放置高度，放不下返回None"""
+        x = skyline[index][0]
+        if x + w > self.bin_size:
+            return None
+
+        y = 0
+        width_left = w
+        while width_left > 0:
+            y = max(y, skyline[index][1])
+            width_left -= skyline[index][2]
+            index += 1
+
+        if y + h > self.bin_size:
+            return None
+        return y
+
+    def insert(self, state, w: int, h: int):
+        best = None
+        for rw, rh, rotated in self.orientations(w, h):
+            for i, (x, _, seg_w) in enumerate(state):
+                y = self.fit(state, i, rw, rh)
+                if y is not None:
+                    score = (y + rh, seg_w)
+                    if best is None or score < best[0]:
+                        best = (score, i, x, y, rw, rh, rotated)
+
+        if best is None:
+            return None
+
+        _, index, x, y, w, h, rotated = best
+        state.insert(index, [x, y + h, w])
+
+        # 收缩/删除被新线段覆盖的旧线段
+        i = index + 1
+        while i < len(state):
+            overlap = x + w - state[i][0]
+            if overlap <= 0:
+                break
+            if overlap >= state[i][2]:
+                del state[i]
+            else:
+                state[i][0] += overlap
+                state[i][2] -= overlap
+                break
+
+        # 合并等高的相邻线段
+        i = 0
+        while i < len(state) - 1:
+            if state[i][1] == state[i + 1][1]:
+                state[i][2] += state[i + 1][2]
+                del state[i + 1]
+            else:
+                i += 1
+
+        return x, y, rotated
+
+
+# 可选的装箱算法
+PACKERS = ('maxrects-bssf', 'maxrects-blsf', 'maxrects-baf', 'skyline', 'shelf')
+DEFAULT_PACKER = 'maxrects-bssf'
+
+
+def create_packer(name: str, atlas_size: int, padding: int = 2, allow_rotation: bool = False) -> Packer:
+    """按名称创建装箱器"""
+    if name.startswith('maxrects-'):
+        return MaxRectsPacker(atlas_size, padding, allow_rotation, heuristic=name[len('maxrects-'):])
+    if name == 'skyline':
+        return SkylinePacker(atlas_size, padding, allow_rotation)
+    if name == 'shelf':
+        return ShelfPacker(atlas_size, padding, allow_rotation)
+    raise ValueError(f"不支持的装箱算法: {name}（可选: {', '.join(PACKERS)}）")
@@ -0,0 +1,145 @@
+"""
+Sheet纹理导出
+PNG编码配置：
+  default: PIL默认参数
+  lossless: 无损，最大压缩（optimize）
+  clean-alpha: 把完全透明像素的RGB清零后无损最大压缩（透明区域压缩得更好，显示不变）
+  palette: 清理透明像素后量化为256色RGBA调色板（有损，体积最小）
+GPU压缩纹理：调用CPU编码器把Sheet PNG转成KTX2，与PNG并存：
+  etc1s / uastc: Basis Universal超压缩，客户端（three.js KTX2Loader）按GPU转码为ETC2/ASTC/BC7
+  astc: 直接编码为ASTC 4x4（仅toktx支持）
+编码器需要在PATH中: toktx（KTX-Software）或 basisu
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import numpy as np
+from PIL import Image, features
+
+
+# PNG编码配置
+PNG_PROFILES = ('default', 'lossless', 'clean-alpha', 'palette')
+DEFAULT_PNG_PROFILE = 'default'
+
+# 可选的纹理格式（png表示只输出PNG）
+TEXTURE_FORMATS = ('png', 'etc1s', 'uastc', 'astc')
+DEFAULT_TEXTURE_FORMAT = 'png'
+
+# PNG Sheet在元数据中的格式名
+PNG_FORMAT_NAME = 'RGBA8888'
+# 各KTX2格式在元数据中的格式名
+KTX2_FORMAT_NAMES = {
+    'etc1s': 'KTX2_ETC1S',
+    'uastc': 'KTX2_UASTC',
+    'astc': 'KTX2_ASTC_4x4',
+}
+
+# 各编码器支持的格式（按优先顺序查找）
+_ENCODER_FORMATS = {
+    'toktx': ('etc1s', 'uastc', 'astc'),
+    'basisu': ('etc1s', 'uastc'),
+}
+
+
+def clean_transparent_pixels(image: Image.Image) -> Image.Image:
+    """把alpha为0的像素的RGB清零（不影响显示，避免透明区域残留的颜色影响压缩率）"""
+    data = np.array(image.convert('RGBA'))
+    data[data[:, :, 3] == 0] = 0
+    return Image.fromarray(data)
+
+
+def premultiply_alpha(image: Image.Image) -> Image.Image:
+    """RGB乘以alpha（预乘alpha），缩小/线性过滤时透明边缘不会出现暗边或色边"""
+    data = np.asarray(image.convert('RGBA'), dtype=np.uint16)
+    alpha = data[:, :, 3:4]
+    rgb = (data[:, :, :3] * alpha + 127) // 255
+    return Image.fromarray(np.concatenate([rgb, alpha], axis=2).astype(np.uint8))
+
+
+def encode_png(image: Image.Image, profile: str = DEFAULT_PNG_PROFILE) -> bytes:
+    """按编码配置把RGBA图像编码为PNG字节"""
+    if profile not in PNG_PROFILES:
+        raise ValueError(f"不支持的PNG编码配置: {profile}（可选: {', '.join(PNG_PROFILES)}）")
+
+    options = {}
+    if profile != 'default':
+        options['optimize'] = True
+    if profile in ('clean-alpha', 'palette'):
+        image = clean_transparent_pixels(image)
+    if profile == 'palette':
+        # RGBA量化只支持libimagequant和fastoctree，优先用质量更好的libimagequant
+        method = Image.Quantize.LIBIMAGEQUANT if features.check('libimagequant') else Image.Quantize.FASTOCTREE
+        image = image.quantize(colors=256, method=method)
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', **options)
+    return buffer.getvalue()
+
+
+def save_png(image: Image.Image, path: str, profile: str = DEFAULT_PNG_PROFILE) -> int:
+    """
+    按编码配置保存PNG
+    返回: 写入的字节数
+    """
+    data = encode_png(image, profile)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def find_encoder(texture_format: str):
+    """
+    查找支持该格式的编码器
+    返回: (编码器名, 可执行文件路径)，找不到返回None
+    """
+    for name, formats in _ENCODER_FORMATS.items():
+        if texture_format in formats:
+            path = shutil.which(name)
+            if path:
+                return name, path
+    return None
+
+
+def encode_command(encoder: tuple, texture_format: str, src_path: str, dst_path: str) -> list:
+    """生成编码命令行"""
+    name, path = encoder
+    if name == 'toktx':
+        args = [path, '--t2', '--encode', texture_format]
+        if texture_format == 'etc1s':
+            args += ['--clevel', '2', '--qlevel', '128']
+        elif texture_format == 'uastc':
+            args += ['--uastc_quality', '2', '--zcmp', '18']
+        else:
+            args += ['--astc_blk_d', '4x4', '--astc_quality', 'medium']
+        return args + [dst_path, src_path]
+
+    args = [path, '-ktx2']
+    if texture_format == 'etc1s':
+        args += ['-comp_level', '2']
+    else:
+        args += ['-uastc', '-uastc_level', '2']
+    return args + ['-file', src_path, '-output_file', dst_path]
+
+
+def export_ktx2(png_path: str, texture_format: str, encoder: tuple) -> str:
+    """
+    把一张PNG编码为同名的.ktx2（先写临时文件，成功后替换）
+    返回: KTX2文件路径；编码失败抛出RuntimeError
+    """
+    dst_path = os.path.splitext(png_path)[0] + '.ktx2'
+    tmp_path = f"{dst_path}.tmp-{os.getpid()}.ktx2"
+    command = encode_command(encoder, texture_format, png_path, tmp_path)
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0 or not os.path.exists(tmp_path):
+            message = (result.stderr or result.stdout).strip().splitlines()
+            raise RuntimeError(f"{encoder[0]} 编码失败 ({result.returncode}): {message[-1] if message else ''}")
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return dst_path
@@ -0,0 +1,146 @@
+"""
+视频信息探测
+打开一次容器读取分辨率、帧率、帧数、时长和编码格式，结果按 (路径, 修改时间, 文件大小) 缓存，
+同一个文件反复查询不会重复打开。关键帧位置在第一次访问时才扫描（只解复用，不解码，只扫描开头的少量关键帧）
+优先使用PyAV（FFmpeg，只读容器头）；没有安装PyAV时退回OpenCV（此时没有关键帧信息）
+"""
+
+import os
+import threading
+import cv2
+
+try:
+    import av
+except ImportError:  # PyAV是可选依赖
+    av = None
+
+
+# 估算关键帧间隔时扫描的关键帧数（间隔取中位数，这个数量已足够稳定）
+KEYFRAME_SAMPLE_COUNT = 16
+
+
+class VideoProbe:
+    """一个视频文件的基本信息（通过 VideoProbe.open 获取，不要直接构造）"""
+
+    # 绝对路径 -> ((修改时间, 文件大小), VideoProbe)
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path: str, width: int, height: int, fps: float, frame_count: int,
+                 duration: float, codec: str):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = frame_count
+        self.duration = duration  # 秒
+        self.codec = codec
+        self._keyframes = {}  # 扫描起点（秒） -> 关键帧时间戳
+
+    @classmethod
+    def open(cls, video_path: str) -> 'VideoProbe':
+        """
+        探测视频信息；文件未修改时直接返回上次的结果
+        无法打开或没有视频流时抛出ValueError
+        """
+        path = os.path.abspath(video_path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise ValueError(f"无法打开视频: {video_path}") from e
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with cls._lock:
+            cached = cls._cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        probe = None
+        if av is not None:
+            try:
+                probe = cls._probe_av(path)
+            except (av.error.FFmpegError, ValueError):
+                probe = None  # 交给OpenCV再试一次
+        if probe is None:
+            probe = cls._probe_cv2(path)
+
+        with cls._lock:
+            cls._cache[path] = (signature, probe)
+        return probe
+
+    @classmethod
+    def _probe_av(cls, path: str) -> 'VideoProbe':
+        """用PyAV读取容器头"""
+        with av.open(path) as container:
+            if not container.streams.video:
+                raise ValueError(f"没有视频流: {path}")
+            stream = container.streams.video[0]
+            fps = float(stream.average_rate or stream.guessed_rate or 0)
+            if stream.duration is not None:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration = container.duration / av.time_base
+            else:
+                duration = 0.0
+            # 部分容器不记录帧数，按时长估算
+            frame_count = stream.frames or int(round(duration * fps))
+            return cls(path, stream.codec_context.width, stream.codec_context.height, fps, frame_count,
+                       duration, stream.codec_context.name)
+
+    @classmethod
+    def _probe_cv2(cls, path: str) -> 'VideoProbe':
+        """用OpenCV读取（没有PyAV或PyAV无法打开时）"""
+        vidcap = cv2.VideoCapture(path)
+        try:
+            if not vidcap.isOpened():
+                raise ValueError(f"无法打开视频: {path}")
+            fps = float(vidcap.get(cv2.CAP_PROP_FPS))
+            frame_count = int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fourcc = int(vidcap.get(cv2.CAP_PROP_FOURCC))
+            codec = fourcc.to_bytes(4, 'little').decode('ascii', 'replace').strip('\x00 ')
+            return cls(path, int(vidcap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(vidcap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                       fps, frame_count, frame_count / fps if fps > 0 else 0.0, codec)
+        finally:
+            vidcap.release()
+
+    @property
+    def resolution(self) -> tuple:
+        """(width, height)"""
+        return self.width, self.height
+
+    def keyframes(self, start_time: float = 0.0) -> list:
+        """
+        从start_time（之前最近的关键帧）起的前 KEYFRAME_SAMPLE_COUNT 个关键帧时间戳（秒，升序）
+        只解复用到凑够数量为止，不读完整个文件；结果按起点缓存，没有PyAV时为空列表
+        """
+        if av is None:
+            return []
+        if start_time not in self._keyframes:
+            self._keyframes[start_time] = self._scan_keyframes(start_time)
+        return self._keyframes[start_time]
+
+    def keyframe_interval(self, start_time: float = 0.0):
+        """start_time附近关键帧间的典型间隔（帧数，取中位数）；关键帧不足两个时为None"""
+        times = self.keyframes(start_time)
+        if len(times) < 2 or self.fps <= 0:
+            return None
+        gaps = sorted(b - a for a, b in zip(times, times[1:]))
+        return max(1, int(round(gaps[len(gaps) // 2] * self.fps)))
+
+    def _scan_keyframes(self, start_time: float) -> list:
+        """定位到start_time之前的关键帧，只解复用视频流的数据包，记录关键帧的时间戳"""
+        times = []
+        try:
+            with av.open(self.path) as container:
+                stream = container.streams.video[0]
+                if start_time > 0:
+                    offset = int(start_time / stream.time_base) + (stream.start_time or 0)
+                    container.seek(offset, stream=stream, backward=True)
+                for packet in container.demux(stream):
+                    if packet.is_keyframe and packet.pts is not None:
+                        times.append(float(packet.pts * stream.time_base))
+                        if len(times) >= KEYFRAME_SAMPLE_COUNT:
+                            break
+        except av.error.FFmpegError:
+            return []
+        return sorted(times)